@@ -1,16 +1,24 @@
-import platform
 import json
-import requests
 import os
-from dotenv import load_dotenv
+import sqlite3
+import time
+from contextlib import nullcontext
 from typing import List, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from rich.console import Console
 from rich.prompt import Confirm, Prompt
-from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.panel import Panel
 from rich.text import Text
-from command_executor import CommandExecutor
+from command_executor import CommandExecutor, CommandResult
+from command_scheduler import CommandScheduler
+from endpoint_pool import EndpointPool
+from history_store import HistoryMatch, HistoryStore
+from http_transport import HttpTransport
+from response_cache import ResponseCache, make_cache_key
+from retry_context import RetryContext, RetryContextBuilder
+from speculation import SpeculativePrefetcher
+from system_profile import SystemProfiler
+from tracing import Tracer
 
 _MASTER_PROMPT = """운영체제에서 활용 가능한 명령줄 스크립트를 작성하는 것이 당신의 목표입니다.
 - 사용자의 요구사항에 맞게 명령어를 생성하고 실행하는 것이 중요합니다.
@@ -26,8 +34,14 @@ _MASTER_PROMPT = """운영체제에서 활용 가능한 명령줄 스크립트
   - 파이프(|)나 리다이렉션(>, >>)도 모두 포함하여 정확히 한 줄에 작성합니다.
 4. options 필드는 선택적으로 아래와 같은 형식을 따릅니다:
    "options": [ { "option_name": "...", "option_type": "...", "replacer": "...", "description": "..." // 필요한 경우 "dangerous": true, "sudo_required": true 등 추가 키를 둘 수 있음 }, ... ]
+5. commands의 명령어들이 서로 독립적이어서 동시에 실행해도 된다면 "parallel": true, 순서대로 실행해야 한다면 "parallel": false 를 추가하세요.
 """
 
+_THINKING_MESSAGE = "✧･ﾟ: *✧･ﾟ:* AI is thinking... *:･ﾟ✧*:･ﾟ✧"
+_MODEL = "claude-3-5-sonnet-20241022"
+_DEFAULT_API_URL = "https://xyevph4z54ojekrgfjnekkuxta0ddbkl.lambda-url.eu-central-1.on.aws/generate"
+_TEMPERATURE = 0.2
+
 @dataclass
 class CommandOption:
     option_name: str
@@ -43,75 +57,181 @@ class CommandResponse:
     dangerous: bool = False
     sudo_required: Optional[bool] = False
     description: Optional[str] = None
+    parallel: Optional[bool] = None
 
 class AICommandLine:
     def __init__(self, console: Console):
         self.console = console
+        from dotenv import load_dotenv
+
         load_dotenv()
-        self.api_url = os.getenv('API_URL', 'https://xyevph4z54ojekrgfjnekkuxta0ddbkl.lambda-url.eu-central-1.on.aws/generate')
         self.headers = {
             "Content-Type": "application/json",
         }
-        self.command_executor = CommandExecutor(self.console)
+        # API_URL may list fallback endpoints after the primary, separated by commas
+        self.api_urls = [url.strip() for url in os.getenv('API_URL', _DEFAULT_API_URL).split(",") if url.strip()]
+        self.api_url = self.api_urls[0] if self.api_urls else _DEFAULT_API_URL
+        self.transport = HttpTransport(self.api_url, self.headers)
+        self.endpoints = EndpointPool(self.transport, self.api_urls or [self.api_url])
+        self.endpoints.warm_up()
+        self.cache_enabled = os.getenv('CHAT_CLI_NO_CACHE', '').lower() not in ('1', 'true', 'yes')
+        self.response_cache = self._open_store(ResponseCache, "Response cache") if self.cache_enabled else None
+        self.stream_enabled = os.getenv('API_STREAM', '').lower() in ('1', 'true', 'yes')
+        self.last_time_to_first_command: Optional[float] = None
+        # Spinners and live panels are turned off when ask_ai runs from worker threads
+        self.show_progress = True
+        self.system_profiler = SystemProfiler()
+        self.system_profiler.start()
+        self.tracer = Tracer()
+        self.command_executor = CommandExecutor(self.console, tracer=self.tracer)
+        self.tools_digest_enabled = os.getenv('CHAT_CLI_TOOLS_DIGEST', '1').lower() not in ('0', 'false', 'no')
+        self.retry_context = RetryContextBuilder()
+        self.history_enabled = os.getenv('CHAT_CLI_HISTORY', '1').lower() not in ('0', 'false', 'no')
+        self.history = self._open_store(HistoryStore, "History") if self.history_enabled else None
+        self.last_retry_context: Optional[RetryContext] = None
+        self.last_result: Optional[CommandResult] = None
+        self.speculation: SpeculativePrefetcher[CommandResponse] = SpeculativePrefetcher(self._speculate)
+
+    def _open_store(self, store, label: str):
+        """Open a sqlite-backed store; without a usable cache directory the CLI runs without it"""
+        try:
+            return store()
+        except (OSError, sqlite3.Error) as e:
+            self.console.print(f"[dim]{label} disabled: {e}[/dim]")
+            return None
 
     def _detect_system_info(self):
-        """Detect and store system information"""
-        self.os_system = platform.system().lower()
-        self.os_release = platform.release()
-        self.os_version = platform.version()
-        self.machine = platform.machine()
-        self.processor = platform.processor()
-
-        # Get more detailed OS information
-        if self.os_system == "linux":
-            try:
-                with open("/etc/os-release") as f:
-                    os_info = dict(line.strip().split('=', 1) for line in f if '=' in line)
-                    self.os_name = os_info.get('PRETTY_NAME', '').strip('"')
-            except:
-                self.os_name = f"Linux {self.os_release}"
-        elif self.os_system == "darwin":
-            self.os_name = f"macOS {platform.mac_ver()[0]}"
-        elif self.os_system == "windows":
-            self.os_name = f"Windows {platform.win32_ver()[0]}"
-        else:
-            self.os_name = f"{self.os_system} {self.os_release}"
-
-        return f"{self.os_name} ({self.machine})"
-
-    def ask_ai(self, query: str) -> CommandResponse:
+        """Return the cached system profile summary, probed once per profile change"""
+        profile = self.system_profiler.get()
+        self.os_system = profile.os_system
+        self.os_release = profile.os_release
+        self.os_version = profile.os_version
+        self.machine = profile.machine
+        self.processor = profile.processor
+        self.os_name = profile.os_name
+        return profile.summary()
+
+    def _parse_response(self, data: dict) -> CommandResponse:
+        return CommandResponse(
+            commands=data["commands"],
+            options=([CommandOption(**opt) for opt in data["options"]] if data.get("options") else []),
+            dangerous=data.get("dangerous", False),
+            sudo_required=data.get("sudo_required", False),
+            description=data.get("description"),
+            parallel=data.get("parallel")
+        )
+
+    def _system_prompt_info(self) -> str:
         sys_info = self._detect_system_info()
-        prompt_system = sys_info + _MASTER_PROMPT
-        payload = {
-            "temperature": 0.2,
-            "model": "claude-3-5-sonnet-20241022",
+        if self.tools_digest_enabled:
+            sys_info += "\n" + self.command_executor.executable_index.digest() + "\n"
+        return sys_info
+
+    @staticmethod
+    def _payload(query: str, sys_info: str) -> dict:
+        return {
+            "temperature": _TEMPERATURE,
+            "model": _MODEL,
             "max_tokens": -1,
-            "prompt_system": prompt_system,
+            "prompt_system": sys_info + _MASTER_PROMPT,
             "inputs": [{"role": "user", "content": query}]
         }
 
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            transient=True,
-        ) as progress:
-            progress.add_task(description="✧･ﾟ: *✧･ﾟ:* AI is thinking... *:･ﾟ✧*:･ﾟ✧", total=None)
-            response = requests.post(self.api_url, json=payload, headers=self.headers)
+    def _request(self, payload: dict, quiet: bool = False) -> dict:
+        """Buffered API call; returns the decoded response data"""
+        with self.tracer.span("http", stream=False), (nullcontext() if quiet else self._thinking()):
+            response = self.endpoints.post(payload)
 
         if response.status_code != 200:
             raise Exception(f"API 호출 실패: {response.status_code}")
 
-        json_response = response.json()
-        data = json.loads(json_response["data"])
+        with self.tracer.span("parse"):
+            json_response = response.json()
+            return json.loads(json_response["data"])
+
+    def ask_ai(self, query: str, use_cache: bool = True) -> CommandResponse:
+        with self.tracer.span("ask_ai") as span:
+            sys_info = self._system_prompt_info()
+            use_cache = use_cache and self.response_cache is not None
+            if use_cache:
+                cache_key = make_cache_key(query, sys_info, _MODEL, _TEMPERATURE, _MASTER_PROMPT)
+                cached = self.response_cache.get(cache_key)
+                span.set(cached=cached is not None)
+                if cached is not None:
+                    if self.show_progress:
+                        self.console.print("[dim]⚡ Cached response[/dim]")
+                    return self._parse_response(cached)
+
+            payload = self._payload(query, sys_info)
+            span.set(query_bytes=len(query.encode("utf-8")))
+
+            if self.stream_enabled and self.show_progress:
+                with self.tracer.span("http", stream=True):
+                    data = self._ask_ai_stream(payload)
+            else:
+                data = self._request(payload)
+            cmd_response = self._parse_response(data)
+            if use_cache:
+                self.response_cache.put(cache_key, asdict(cmd_response))
+            return cmd_response
+
+    def _thinking(self):
+        if not self.show_progress:
+            return nullcontext()
+        from rich.progress import Progress, SpinnerColumn, TextColumn
+
+        progress = Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            console=self.console,
+            transient=True,
+        )
+        progress.add_task(description=_THINKING_MESSAGE, total=None)
+        return progress
+
+    def _ask_ai_stream(self, payload: dict) -> dict:
+        """Request a streamed response, drawing the command panel as commands arrive"""
+        from rich.live import Live
+        from rich.spinner import Spinner
+        from stream_parser import IncrementalCommandParser, iter_stream_text
+
+        start = time.perf_counter()
+        self.last_time_to_first_command = None
+        response = self.endpoints.post(dict(payload, stream=True), stream=True)
+        try:
+            if response.status_code != 200:
+                raise Exception(f"API 호출 실패: {response.status_code}")
+
+            # Endpoints without streaming support answer with the regular JSON envelope
+            if "application/json" in response.headers.get("Content-Type", ""):
+                return json.loads(response.json()["data"])
+
+            parser = IncrementalCommandParser()
+            with Live(Spinner("dots", text=_THINKING_MESSAGE), console=self.console,
+                      transient=True, refresh_per_second=20) as live:
+                for chunk in iter_stream_text(response):
+                    new_commands = parser.feed(chunk)
+                    if new_commands and self.last_time_to_first_command is None:
+                        self.last_time_to_first_command = time.perf_counter() - start
+                    if new_commands or (parser.done and parser.commands):
+                        live.update(self._build_command_panel(self._parse_partial(parser.fields, parser.commands)))
+            return parser.result()
+        finally:
+            response.close()
+
+    def _parse_partial(self, fields: dict, commands: List[str]) -> CommandResponse:
         return CommandResponse(
-            commands=data["commands"],
-            options=([CommandOption(**opt) for opt in data["options"]] if "options" in data else []),
-            dangerous=data.get("dangerous", False),
-            sudo_required=data.get("sudo_required", False),
-            description=data.get("description")
+            commands=list(commands),
+            dangerous=fields.get("dangerous", False),
+            sudo_required=fields.get("sudo_required", False),
+            description=fields.get("description")
         )
 
     def display_command(self, cmd_response: CommandResponse):
+        with self.tracer.span("render"):
+            self.console.print(self._build_command_panel(cmd_response))
+
+    def _build_command_panel(self, cmd_response: CommandResponse) -> Panel:
         # Create styled command text
         cmd_text = Text()
 
@@ -141,13 +261,34 @@ class AICommandLine:
             status.append("✨ [green]Safe to Execute[/green]")
 
         # Create command panel
-        panel = Panel(
+        return Panel(
             cmd_text,
             title="🤖 Command to Execute",
             subtitle=" ".join(status) if status else None,
             style="bold green" if not cmd_response.dangerous else "bold red"
         )
-        self.console.print(panel)
+
+    def display_suggestions(self, matches: List[HistoryMatch]):
+        """Show previously successful commands for similar queries while the AI is asked"""
+        self.console.print("[dim]📜 Previously worked for similar requests (enter its number to reuse it):[/dim]")
+        for number, match in enumerate(matches, 1):
+            self.console.print(Text(f"╰─➤ {number}. {' && '.join(match.commands)}  ({match.query})", style="dim"),
+                               crop=False)
+
+    def _history_response(self, match: HistoryMatch) -> CommandResponse:
+        """The past response of a suggestion, flags included, falling back to its bare commands"""
+        try:
+            return self._parse_response(match.response)
+        except (KeyError, TypeError):
+            return CommandResponse(commands=match.commands)
+
+    def _record_history(self, query: str, response: CommandResponse, return_code: int, duration: float):
+        if self.history is None:
+            return
+        try:
+            self.history.record(query, asdict(response), return_code, duration)
+        except Exception as e:
+            self.console.print(f"[dim]History not saved: {e}[/dim]")
 
     def display_help(self, cmd_response: CommandResponse):
         if cmd_response.description:
@@ -160,13 +301,110 @@ class AICommandLine:
                 self.console.print(f"╰─➤ {opt.option_name}: {opt.description}")
 
     def reask_ai_with_last_command(self, ask:str, command_stack: List[str], last_output: str, return_code: int = 0) -> CommandResponse:
-        """Re-ask AI with the last command and output"""
-        last_command = command_stack[-1]
-        used_command = "\n".join(map(lambda s: f"`{s}`", command_stack))
-        query = f"\n\n[Goal]\n{ask}\n\n[FIX or REVISE]\ncommand:\n`{last_command}`\n" \
-              + f"ReturnCode: {return_code}\n다음 출력을 참고하시오:\n```{last_output}```\n\n" \
-              + f"다음 커맨드는 이미 시도해 보았습니다.:\n{used_command}"
-        return self.ask_ai(query)
+        """Re-ask AI with the last command and output, trimmed to the retry token budget"""
+        self.tracer.count("retries")
+        with self.tracer.span("reask") as span:
+            context = self.retry_context.build(ask, command_stack, last_output, return_code)
+            self.last_retry_context = context
+            span.set(query_bytes=context.size, trimmed_bytes=context.trimmed_bytes)
+            if context.trimmed_bytes and self.show_progress:
+                self.console.print(f"[dim]✂️ Retry context: {context.size} bytes (~{context.tokens} tokens), "
+                                   f"{context.trimmed_bytes} bytes trimmed[/dim]")
+            return self._ask_speculated(context.query)
+
+    def ask_alternative(self, ask: str, response: CommandResponse) -> CommandResponse:
+        """Ask for a different approach to the same goal than the commands shown"""
+        with self.tracer.span("alternative"):
+            context = self.retry_context.alternative(ask, response.commands)
+            return self._ask_speculated(context.query)
+
+    def _ask_speculated(self, query: str) -> CommandResponse:
+        """The prefetched response for a retry or alternative, or a request made now
+
+        Retry and alternative work the same with speculation off, with the
+        budget spent or after a failed prefetch; they only take longer.
+        """
+        return self._prefetched(query) or self.ask_ai(query, use_cache=False)
+
+    def _speculate(self, query: str) -> CommandResponse:
+        """Fetch a response for the prefetcher; runs on its worker thread and draws nothing"""
+        with self.tracer.span("speculate"):
+            return self._parse_response(self._request(self._payload(query, self._system_prompt_info()), quiet=True))
+
+    def _prefetched(self, query: str) -> Optional[CommandResponse]:
+        if not self.speculation.enabled:
+            return None
+        ready = self.speculation.ready(query)
+        with nullcontext() if ready else self._thinking():
+            response = self.speculation.take(query)
+        if response is not None and self.show_progress:
+            self.console.print("[dim]🔮 Prefetched response[/dim]")
+        return response
+
+    def prefetch_retry(self, ask: str, command_stack: List[str], last_output: str, return_code: int = 0):
+        """Start the request a retry would send, so choosing retry finds it ready"""
+        if self.speculation.enabled:
+            self.speculation.prefetch(self.retry_context.build(ask, command_stack, last_output, return_code).query)
+
+    def prefetch_alternative(self, ask: str, response: CommandResponse):
+        if self.speculation.enabled:
+            self.speculation.prefetch(self.retry_context.alternative(ask, response.commands).query)
+
+    def display_stats(self):
+        """Per-phase latency percentiles for this session, cache hit rate and retry count"""
+        from rich.table import Table
+
+        if not self.tracer.enabled:
+            self.console.print("[yellow]Tracing is off; set CHAT_CLI_TRACE=1 for phase timings.[/yellow]")
+        phases = self.tracer.percentiles()
+        if phases:
+            table = Table(title="📊 Latency per phase (ms)")
+            table.add_column("phase")
+            for column in ("count", "p50", "p95", "p99"):
+                table.add_column(column, justify="right")
+            for name, summary in sorted(phases.items(), key=lambda item: -item[1]["p50"]):
+                table.add_row(name, str(summary["count"]),
+                              *(f"{summary[p] * 1000:.1f}" for p in ("p50", "p95", "p99")))
+            self.console.print(table)
+        if self.response_cache is not None:
+            cache = self.response_cache.stats()
+            self.console.print(f"⚡ Cache: {cache['hits']} hits / {cache['misses']} misses "
+                               f"({cache['hit_rate'] * 100:.0f}% hit rate, {cache['entries']} entries)")
+        self.console.print(f"🔁 Retries: {self.tracer.counters['retries']}, "
+                           f"turns: {self.tracer.counters['turns']}")
+        if self.speculation.enabled:
+            spec = self.speculation.stats()
+            self.console.print(f"🔮 Speculative: {spec.get('used', 0)} used of {spec.get('started', 0)} started "
+                               f"({spec.get('waited', 0)} still in flight when used, {spec.get('cancelled', 0)} cancelled, "
+                               f"{spec.get('wasted', 0)} wasted, {spec.get('failed', 0)} failed), "
+                               f"budget left {spec['budget_left']}")
+        pool = self.endpoints.stats()
+        if len(pool["endpoints"]) > 1 or pool["retries"]:
+            self.console.print(f"🌐 Hedged requests: {pool['hedges']} ({pool['hedge_wins']} won by a backup), "
+                               f"API retries: {pool['retries']}")
+            for endpoint in pool["endpoints"]:
+                p95 = f"{endpoint['p95'] * 1000:.0f}ms" if endpoint["p95"] is not None else "-"
+                self.console.print(f"   {endpoint['url']} ({endpoint['state']}) "
+                                   f"ok {endpoint['successes']} / failed {endpoint['failures']}, p95 {p95}")
+        if self.tracer.enabled:
+            self.console.print(f"[dim]Trace file: {self.tracer.path}[/dim]")
+
+    def browse_output(self, args: List[str]):
+        """Page or search the saved output of the last command ('/output' or '/output err')"""
+        from output_viewer import OutputViewer
+
+        result = self.last_result
+        stream = "stderr" if args[:1] in (["err"], ["stderr"]) else "stdout"
+        path = result and (result.stderr_file if stream == "stderr" else result.stdout_file)
+        if not path or not os.path.exists(path):
+            if path:
+                self.console.print("[yellow]The saved output was removed when the next command ran.[/yellow]")
+            elif result and result.omitted_lines:
+                self.console.print("[yellow]The full output was not saved (CHAT_CLI_OUTPUT_SPILL=0).[/yellow]")
+            else:
+                self.console.print(f"[yellow]No saved {stream} to browse; the last output was shown in full.[/yellow]")
+            return
+        OutputViewer(self.console, path).browse()
 
     def run(self):
         command_stack = []
@@ -184,52 +422,97 @@ class AICommandLine:
                     self.console.print("[yellow]프로그램을 종료합니다...[/yellow]")
                     break
 
+                if user_input == "/stats":
+                    self.display_stats()
+                    continue
+
+                if user_input.split()[:1] == ["/output"]:
+                    self.browse_output(user_input.split()[1:])
+                    continue
+
                 # Handle AI query
                 query = user_input
                 if not query:
                     self.console.print("[red]질문을 입력해주세요.[/red]")
                     continue
 
+                # Attempts only carry over between retries of the same goal
+                command_stack = []
+                self.tracer.count("turns")
+                turn = self.tracer.start_span("turn")
                 try:
+                    matches: List[HistoryMatch] = []
+                    if self.history is not None:
+                        with self.tracer.span("history"):
+                            matches = self.history.suggest(query)
+                        if matches:
+                            self.display_suggestions(matches)
                     response = self.ask_ai(query)
                     self.display_command(response)
 
                     while True:
-                        choice = Prompt.ask(
-                            "실행하시겠습니까?",
-                            choices=["y", "n", "?"],
-                            default="n"
-                        )
+                        # Fetched while the user reads the panel, so "a" answers at once
+                        self.prefetch_alternative(query, response)
+                        picks = [str(number) for number in range(1, len(matches) + 1)]
+                        hint = f"a=alternative, 1-{len(picks)}=history" if picks else "a=alternative"
+                        with self.tracer.span("confirm"):
+                            choice = Prompt.ask(
+                                f"실행하시겠습니까? ({hint})",
+                                choices=["y", "n", "?", "a"] + picks,
+                                default="n"
+                            )
 
                         if choice == "?":
                             self.display_help(response)
                             continue
+                        elif choice in picks:
+                            # Shown again so the reused commands are confirmed like any other answer
+                            response = self._history_response(matches[int(choice) - 1])
+                            self.speculation.cancel()
+                            self.display_command(response)
+                            continue
+                        elif choice == "a":
+                            response = self.ask_alternative(query, response)
+                            self.speculation.cancel()
+                            self.display_command(response)
+                            continue
                         elif choice.lower() == "y":
+                            self.speculation.cancel()
                             self.console.print("[green]🚀 Starting command execution...[/green]")
 
                             # Execute each command with proper error handling
                             execution_success = True
+                            execution_start = time.perf_counter()
+                            scheduler = CommandScheduler(
+                                self.command_executor,
+                                response.commands,
+                                sudo_required=response.sudo_required,
+                                parallel_hint=response.parallel
+                            )
                             for index, cmd in enumerate(response.commands, 1):
                                 command_stack.append(cmd)
                                 # Show current command
                                 command_status = Text.from_markup(f"\n[cyan]⚡ Executing command ({index}/{len(response.commands)}):[/cyan] {cmd}")
                                 self.console.print(command_status, end="", crop=False)
 
-                                # Execute the command using CommandExecutor
+                                # Execute the command, or collect it from its parallel group
                                 try:
-                                    success, result = self.command_executor.execute_command(
-                                        cmd,
-                                        sudo_required=response.sudo_required,
-                                        is_dangerous=response.dangerous
-                                    )
+                                    success, result = scheduler.execute(index - 1, is_dangerous=response.dangerous)
 
                                     last_command = cmd
-                                    return_code = result.returncode
                                     if result:
+                                        self.last_result = result
+                                        return_code = result.returncode
                                         last_output = "STDOUT:\n" + (result.stdout or "") + "\nSTDERR:\n" + (result.stderr or "")
+                                        if result.limit_hit:
+                                            # Tell the model why the command stopped so it can narrow it down
+                                            limit = self.command_executor.limits.describe(result.limit_hit)
+                                            last_output = f"LIMIT: command {limit}\n" + last_output
 
-                                    else:
+                                    if not success:
                                         execution_success = success
+                                        # The fix-up request goes out while the user decides
+                                        self.prefetch_retry(query, command_stack, last_output, return_code)
                                         choices = ["continue", "retry", "abort"]
                                         action = Prompt.ask(
                                             "[yellow]💫 Command failed. What would you like to do?[/yellow]",
@@ -242,20 +525,30 @@ class AICommandLine:
                                             new_response = self.reask_ai_with_last_command(query, command_stack, last_output, return_code)
                                             self.display_command(new_response)
                                             continue
-                                        elif action == "abort":
+                                        self.speculation.cancel()
+                                        if action == "abort":
                                             command_stack = []
+                                            scheduler.cancel()
                                             self.console.print("[yellow]⚠️ Execution aborted by user[/yellow]")
                                             break
                                         # "continue" will move to next command
 
                                 except KeyboardInterrupt:
                                     self.console.print("\n[yellow]⚠️ Command interrupted by user[/yellow]")
+                                    # An interrupted command did not succeed, whatever comes next
+                                    execution_success = False
+                                    return_code = 130
                                     if not Confirm.ask("[yellow]Continue with remaining commands?[/yellow]"):
+                                        scheduler.cancel()
                                         break
                                     continue
+                            scheduler.close()
+                            self._record_history(query, response, 0 if execution_success else (return_code or 1),
+                                                 time.perf_counter() - execution_start)
 
                             # After all commands
                             if execution_success:
+                                self.prefetch_retry(query, command_stack, last_output, return_code)
                                 choices = ["d", "r"]
                                 action = Prompt.ask("[green]All commands completed. Next action?[/green] (d=done, r=retry)", choices=choices, default="d")
                                 if action == "d":
@@ -273,6 +566,10 @@ class AICommandLine:
                             break
                 except Exception as e:
                     self.console.print(f"[red]Error occurred: {str(e)}[/red]")
+                finally:
+                    # Whatever was prefetched for this goal is stale once the turn ends
+                    self.speculation.cancel()
+                    turn.end()
 
 
             except KeyboardInterrupt:
@@ -280,4 +577,10 @@ class AICommandLine:
                 break
 
             except Exception as e:
-                self.console.print(f"[red]Unexpected error occurred: {str(e)}[/red]")
\ No newline at end of file
+                self.console.print(f"[red]Unexpected error occurred: {str(e)}[/red]")
+
+        self.speculation.close()
+        self.command_executor.close()
+        if self.history is not None:
+            self.history.close()
+        self.tracer.close()
\ No newline at end of file
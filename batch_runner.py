@@ -0,0 +1,128 @@
+import json
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import asdict
+from typing import IO, Dict, Iterator, Set, Tuple
+
+from ai_command_line import AICommandLine
+
+
+class RateLimiter:
+    """Space out calls so that at most `rate` start per second"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def read_queries(stream: IO[str]) -> Iterator[Tuple[int, Dict]]:
+    """Yield (index, record) for each query line; plain text lines are taken as the query"""
+    for index, line in enumerate(stream):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = line
+        if not isinstance(record, dict):
+            record = {"query": str(record)}
+        yield index, record
+
+
+class BatchRunner:
+    """Answer many queries with bounded concurrency, writing one JSON result per line
+
+    Nothing is executed; with `validate` the generated commands are only
+    checked by CommandExecutor.check_command.
+    """
+
+    def __init__(self, cli: AICommandLine, concurrency: int = 4, rate_limit: float = 0.0,
+                 validate: bool = False):
+        self.cli = cli
+        self.concurrency = max(1, concurrency)
+        self.rate_limiter = RateLimiter(rate_limit)
+        self.validate = validate
+        self.succeeded = 0
+        self.failed = 0
+        self.cli.show_progress = False
+        self.cli.transport.set_pool_size(self.concurrency)
+        self.cli.endpoints.set_concurrency(self.concurrency)
+
+    def _process(self, index: int, record: Dict) -> Dict:
+        query = record.get("query") or record.get("q") or ""
+        result = {"index": index, "id": record.get("id"), "query": query}
+        self.rate_limiter.acquire()
+        start = time.perf_counter()
+        try:
+            if not query:
+                raise ValueError("Missing query")
+            response = self.cli.ask_ai(query)
+            result["response"] = asdict(response)
+            result["error"] = None
+        except Exception as e:
+            result["response"] = None
+            result["error"] = str(e) or type(e).__name__
+        result["latency"] = round(time.perf_counter() - start, 4)
+
+        if self.validate and result["response"]:
+            result["validation"] = [
+                {"command": cmd, "issues": self.cli.command_executor.check_command(cmd)}
+                for cmd in result["response"]["commands"]
+            ]
+        return result
+
+    def run(self, source: IO[str], sink: IO[str]) -> Tuple[int, int]:
+        """Process every query from source; returns (succeeded, failed)"""
+        # Only a couple of batches are queued at once so huge inputs are streamed, not loaded
+        max_pending = self.concurrency * 2
+        pending: Set[Future] = set()
+
+        def drain(block_until: int):
+            nonlocal pending
+            while len(pending) > block_until:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._write(future.result(), sink)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch") as pool:
+            for index, record in read_queries(source):
+                pending.add(pool.submit(self._process, index, record))
+                drain(max_pending - 1)
+            drain(0)
+        return self.succeeded, self.failed
+
+    def _write(self, result: Dict, sink: IO[str]):
+        if result["error"]:
+            self.failed += 1
+        else:
+            self.succeeded += 1
+        sink.write(json.dumps(result, ensure_ascii=False) + "\n")
+        sink.flush()
+
+
+def run_batch(cli: AICommandLine, input_path: str, output_path: str = "-", concurrency: int = 4,
+              rate_limit: float = 0.0, validate: bool = False) -> Tuple[int, int]:
+    source = sys.stdin if input_path == "-" else open(input_path, encoding="utf-8")
+    sink = sys.stdout if output_path == "-" else open(output_path, "w", encoding="utf-8")
+    try:
+        runner = BatchRunner(cli, concurrency=concurrency, rate_limit=rate_limit, validate=validate)
+        return runner.run(source, sink)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
@@ -0,0 +1,40 @@
+"""Batch throughput against a mock endpoint at several concurrency levels
+
+    python -m benchmarks.bench_batch --queries 40 --latency 0.1 --concurrency 1 2 4 8
+"""
+import argparse
+import io
+import os
+import time
+
+from rich.console import Console
+
+from benchmarks.mock_server import MockLLMServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    os.environ["CHAT_CLI_NO_CACHE"] = "1"
+    from ai_command_line import AICommandLine
+    from batch_runner import BatchRunner
+
+    with MockLLMServer(latency=args.latency) as server:
+        os.environ["API_URL"] = server.url
+        source = "".join(f'{{"id": {i}, "query": "runbook question {i}"}}\n' for i in range(args.queries))
+        for concurrency in args.concurrency:
+            cli = AICommandLine(Console(file=io.StringIO()))
+            runner = BatchRunner(cli, concurrency=concurrency)
+            start = time.perf_counter()
+            succeeded, failed = runner.run(io.StringIO(source), io.StringIO())
+            elapsed = time.perf_counter() - start
+            print(f"concurrency={concurrency:>3}: {succeeded / elapsed:7.2f} queries/s "
+                  f"({succeeded} ok, {failed} failed, {elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
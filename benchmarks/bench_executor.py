@@ -0,0 +1,45 @@
+"""Per-command overhead of the spawn path vs. the persistent shell session
+
+    python -m benchmarks.bench_executor --runs 200
+"""
+import argparse
+import io
+import time
+
+from rich.console import Console
+
+from command_executor import CommandExecutor
+
+
+def _bench(run, runs: int) -> float:
+    run()  # Warm up (starts the persistent shell)
+    start = time.perf_counter()
+    for _ in range(runs):
+        run()
+    return (time.perf_counter() - start) / runs
+
+
+def _run_raw(executor: CommandExecutor, command: str):
+    """Run the command without the spinner, isolating the process-level cost"""
+    if executor.shell_session:
+        return executor._run_in_session(command)
+    return executor._stream_process(executor._spawn(command))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--command", default="echo ok")
+    args = parser.parse_args()
+
+    console = Console(file=io.StringIO())
+    for name, persistent in (("spawn", False), ("persistent", True)):
+        executor = CommandExecutor(console, persistent_shell=persistent)
+        raw = _bench(lambda: _run_raw(executor, args.command), args.runs)
+        full = _bench(lambda: executor.execute_command(args.command), args.runs)
+        executor.close()
+        print(f"{name:>10}: raw={raw * 1000:7.3f}ms  execute_command={full * 1000:7.3f}ms per command")
+
+
+if __name__ == "__main__":
+    main()
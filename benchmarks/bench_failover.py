@@ -0,0 +1,81 @@
+"""Tail latency of a single endpoint against the hedged EndpointPool under injected faults
+
+    python -m benchmarks.bench_failover --requests 300 --slow-rate 0.05 --fail-rate 0.05
+"""
+import argparse
+import math
+import time
+
+from benchmarks.mock_server import MockLLMServer
+from endpoint_pool import EndpointPool
+from http_transport import HttpTransport
+
+
+PAYLOAD = {"inputs": [{"role": "user", "content": "who is listening on port 5678"}]}
+
+
+def _percentile(values, p: float) -> float:
+    values = sorted(values)
+    return values[max(0, math.ceil(p * len(values)) - 1)]
+
+
+def _run(post, requests: int):
+    timings, errors = [], 0
+    for _ in range(requests):
+        start = time.perf_counter()
+        try:
+            response = post(PAYLOAD)
+            if response.status_code != 200:
+                errors += 1
+            response.close()
+        except Exception:
+            errors += 1
+        timings.append(time.perf_counter() - start)
+    return timings, errors
+
+
+def _report(name: str, timings, errors: int, extra: str = ""):
+    print(f"{name:>8}: p50={_percentile(timings, 0.50) * 1000:7.1f}ms  "
+          f"p95={_percentile(timings, 0.95) * 1000:7.1f}ms  p99={_percentile(timings, 0.99) * 1000:7.1f}ms  "
+          f"errors={errors}/{len(timings)}{extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.02, help="normal response time in seconds")
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="share of requests that stall")
+    parser.add_argument("--slow-latency", type=float, default=0.5, help="response time of a stalled request")
+    parser.add_argument("--fail-rate", type=float, default=0.05, help="share of requests answered with 503")
+    parser.add_argument("--hedge-delay", type=float, default=0.1,
+                        help="hedge delay until the primary has enough latency samples")
+    args = parser.parse_args()
+
+    def server(seed: int) -> MockLLMServer:
+        return MockLLMServer(latency=args.latency, slow_rate=args.slow_rate, slow_latency=args.slow_latency,
+                             fail_rate=args.fail_rate, seed=seed).start()
+
+    primary, backup = server(1), server(2)
+    try:
+        single = HttpTransport(primary.url)
+        single.warm_up(background=False)
+        _report("single", *_run(single.post, args.requests))
+        single.close()
+
+        transport = HttpTransport(primary.url)
+        pool = EndpointPool(transport, [primary.url, backup.url], hedge_delay=args.hedge_delay,
+                            backoff_base=0.01, breaker_reset=1.0)
+        pool.warm_up()
+        timings, errors = _run(pool.post, args.requests)
+        stats = pool.stats()
+        _report("hedged", timings, errors,
+                f"  hedges={stats['hedges']} backup wins={stats['hedge_wins']} retries={stats['retries']}")
+        pool.close()
+        transport.close()
+    finally:
+        primary.stop()
+        backup.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Cost of the resource governor per command, and how fast each limit stops a runaway command
+
+    python -m benchmarks.bench_governor --runs 200
+"""
+import argparse
+import io
+import time
+
+from rich.console import Console
+
+from command_executor import CommandExecutor
+
+
+def _per_command(executor: CommandExecutor, runs: int) -> float:
+    executor._stream_process(executor._spawn("true"))
+    start = time.perf_counter()
+    for _ in range(runs):
+        executor._stream_process(executor._spawn("true"))
+    return (time.perf_counter() - start) / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    executor = CommandExecutor(Console(file=io.StringIO()), persistent_shell=False)
+    executor.limits.timeout = executor.limits.max_output_bytes = 0
+    bare = _per_command(executor, args.runs)
+    executor.limits.timeout, executor.limits.max_output_bytes = 600, 256 * 1024 * 1024
+    watched = _per_command(executor, args.runs)
+    executor.limits.cpu_seconds, executor.limits.memory_bytes, executor.limits.nice = 600, 4 << 30, 1
+    limited = _per_command(executor, args.runs)
+    print(f"per command: no limits={bare * 1000:.2f}ms  timeout+output cap={watched * 1000:.2f}ms  "
+          f"+rlimits/nice={limited * 1000:.2f}ms")
+
+    cases = (
+        ("timeout 1s", "sleep 60 | cat", dict(timeout=1)),
+        ("output 16MB", "yes | cat", dict(max_output_bytes=16 * 1024 * 1024)),
+        ("cpu 1s", "sh -c 'while :; do :; done'", dict(cpu_seconds=1)),
+    )
+    for name, command, limits in cases:
+        executor.limits.timeout, executor.limits.max_output_bytes = 30, 0
+        executor.limits.cpu_seconds = executor.limits.memory_bytes = executor.limits.nice = 0
+        for key, value in limits.items():
+            setattr(executor.limits, key, value)
+        start = time.perf_counter()
+        result = executor._stream_process(executor._spawn(command))
+        print(f"{name:>12}: stopped in {time.perf_counter() - start:6.2f}s  "
+              f"limit_hit={result.limit_hit} returncode={result.returncode}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""History suggestion latency, appends and compaction at 100k entries
+
+    python -m benchmarks.bench_history --entries 100000 --lookups 500
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from history_store import HistoryStore
+from response_cache import normalize_query
+
+_VERBS = ["show", "list", "find", "count", "kill", "restart", "check", "print", "delete", "compress"]
+_OBJECTS = ["processes", "open ports", "large files", "log errors", "docker containers", "disk usage",
+            "failed services", "cron jobs", "listening sockets", "zombie processes", "git branches"]
+_QUALIFIERS = ["using port {n}", "older than {n} days", "in /var/log", "owned by user{n}", "sorted by memory",
+               "from the last {n} hours", "larger than {n}MB", "for service svc{n}", "numbered", "as json"]
+
+
+def make_query(rng: random.Random) -> str:
+    return " ".join([
+        rng.choice(_VERBS), rng.choice(_OBJECTS),
+        rng.choice(_QUALIFIERS).format(n=rng.randint(1, 5000)),
+        rng.choice(_QUALIFIERS).format(n=rng.randint(1, 5000)),
+    ])
+
+
+def populate(store: HistoryStore, count: int, rng: random.Random):
+    """Bulk-load entries the way record() stores them, then build the index once"""
+    rows = []
+    for i in range(count):
+        query = make_query(rng)
+        commands = json.dumps([f"echo {i}"])
+        rows.append((time.time(), query, normalize_query(query), commands, json.dumps({"commands": [f"echo {i}"]}),
+                     0 if rng.random() < 0.8 else 1, rng.random()))
+    with store._conn:
+        store._conn.execute("BEGIN")
+        store._conn.executemany(
+            "INSERT INTO entries (created_at, query, norm, commands, response, returncode, duration)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--appends", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(12)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HistoryStore(path=os.path.join(tmp, "history.sqlite3"), max_entries=args.entries * 2)
+        populate(store, args.entries, rng)
+
+        start = time.perf_counter()
+        store.compact()
+        print(f"{args.entries} entries, compaction (full index build): {time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        for _ in range(args.appends):
+            store.record(make_query(rng), {"commands": ["echo appended"]}, 0, 0.1)
+        elapsed = time.perf_counter() - start
+        print(f"record(): {elapsed / args.appends * 1000:.2f}ms per entry (incremental merges included)")
+
+        latencies = []
+        hits = 0
+        for _ in range(args.lookups):
+            query = make_query(rng)
+            start = time.perf_counter()
+            matches = store.suggest(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += bool(matches)
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f"suggest(): p50 {statistics.median(latencies):.2f}ms, p95 {p95:.2f}ms, "
+              f"max {latencies[-1]:.2f}ms, {hits}/{args.lookups} with suggestions")
+        print(f"stats: {store.stats()}")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Startup import-time budget, measured with `python -X importtime`
+
+    python -m benchmarks.bench_import_time              # exits 1 when a budget is exceeded
+    python -m benchmarks.bench_import_time --runs 9 --scale 1.5
+
+Mirrors main.py: the banner modules are imported first, then the
+assistant. Heavy modules that load on first use must not show up at all.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import time per startup stage, in milliseconds
+BUDGETS = {
+    "banner": (["rich.console", "rich.panel"], 80),
+    "assistant": (["ai_command_line"], 120),
+}
+# Loaded on first use (the first API call, spinner, streamed answer or batch run)
+DEFERRED = ["requests", "urllib3", "dotenv", "rich.progress", "rich.live", "stream_parser", "batch_runner"]
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def measure():
+    """Return ({top-level module: cumulative ms}, {every imported module})"""
+    statement = "; ".join(f"import {', '.join(modules)}" for modules, _ in BUDGETS.values())
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            cwd=_ROOT, capture_output=True, text=True, check=True)
+    top_level, imported = {}, set()
+    for self_us, cumulative_us, indent, name in _LINE.findall(result.stderr):
+        imported.add(name)
+        if not indent:
+            top_level[name] = int(cumulative_us) / 1000
+    return top_level, imported
+
+
+def check(runs: int = 5, scale: float = 1.0):
+    """Return (report lines, problems) for the median of `runs` measurements against budgets x `scale`"""
+    samples = {stage: [] for stage in BUDGETS}
+    imported = set()
+    for _ in range(runs):
+        top_level, imported = measure()
+        for stage, (modules, _) in BUDGETS.items():
+            samples[stage].append(sum(top_level.get(module, 0.0) for module in modules))
+
+    lines, problems = [], []
+    for stage, (modules, budget) in BUDGETS.items():
+        elapsed = statistics.median(samples[stage])
+        limit = budget * scale
+        over = elapsed > limit
+        if over:
+            problems.append(f"{stage} took {elapsed:.1f}ms, budget {limit:.0f}ms")
+        lines.append(f"{stage:<10} {elapsed:7.1f}ms / {limit:5.0f}ms  {'OVER BUDGET' if over else 'ok'}  "
+                     f"({', '.join(modules)})")
+
+    eager = [module for module in DEFERRED if module in imported]
+    if eager:
+        problems.append(f"imported at startup but should load lazily: {', '.join(eager)}")
+        lines.append(problems[-1])
+    return lines, problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply budgets, e.g. for slow CI machines")
+    args = parser.parse_args()
+
+    lines, problems = check(args.runs, args.scale)
+    for line in lines:
+        print(line)
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Time to render a command's output through CommandExecutor, and to page and search it afterwards
+
+    python -m benchmarks.bench_output --lines 10000 100000 1000000
+"""
+import argparse
+import io
+import os
+import time
+
+from rich.console import Console
+from rich.text import Text
+
+from command_executor import CommandExecutor
+from output_viewer import OutputViewer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, nargs="+", default=[10000, 100000, 1000000])
+    args = parser.parse_args()
+
+    for lines in args.lines:
+        command = f"seq -f 'line %.0f of the output' 1 {lines}"
+        sink = io.StringIO()
+        executor = CommandExecutor(Console(file=sink, width=120), persistent_shell=False)
+        start = time.perf_counter()
+        _, result = executor.execute_command(command)
+        windowed = time.perf_counter() - start
+        executor.close()
+
+        # What drawing everything costs: the same text printed in full
+        start = time.perf_counter()
+        Console(file=io.StringIO(), width=120).print(Text(open(result.stdout_file).read() if result.stdout_file
+                                                          else result.stdout), soft_wrap=True)
+        full = time.perf_counter() - start
+
+        viewer_line = ""
+        if result.stdout_file:
+            viewer = OutputViewer(Console(file=io.StringIO(), width=120), result.stdout_file)
+            start = time.perf_counter()
+            viewer.show_page(lines // 2)
+            page = time.perf_counter() - start  # Includes building the line index
+            start = time.perf_counter()
+            viewer.show_search(f"line {lines - 1} of")
+            search = time.perf_counter() - start
+            viewer_line = f"  page={page * 1000:7.1f}ms  search={search * 1000:7.1f}ms"
+            os.unlink(result.stdout_file)
+        print(f"{lines:>8} lines: run+render={windowed * 1000:8.1f}ms ({len(sink.getvalue().splitlines())} lines drawn)"
+              f"  full render={full * 1000:8.1f}ms{viewer_line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Policy evaluation cost over a corpus of generated commands
+
+    python -m benchmarks.bench_policy --commands 3000 --site-rules 300
+"""
+import argparse
+import random
+import re
+import time
+
+from command_policy import DEFAULT_RULES, CommandPolicy, load_rules
+
+
+_TEMPLATES = [
+    "df -h", "free -m", "ss -tlnp | grep ':{port}'", "lsof -i :{port} | tail -n +2 | awk '{{print $2}}'",
+    "ps aux --sort=-%mem | head -n {n}", "du -sh /var/log/* 2>/dev/null | sort -h | tail -n {n}",
+    "journalctl -u {svc} --since '1 hour ago' | grep -i error", "systemctl status {svc}",
+    "find /var/log -name '*.log' -mtime +{n} -print", "tail -n {n} /var/log/syslog",
+    "grep -rn 'TODO' src/ | wc -l", "docker ps --format '{{{{.Names}}}}' | grep {svc}",
+    "netstat -tulpn 2>/dev/null | grep ':{port}' | awk '{{print NR \". PID: \" $7}}'",
+    "sudo lsof -i :{port} | tail -n +2", "git add . && git commit -m 'update {svc}'",
+    "rm -rf /tmp/{svc}-cache", "tar czf /tmp/{svc}.tgz /etc/{svc}", "chmod -R 755 /srv/{svc}",
+    "curl -s http://localhost:{port}/health | jq .status", "echo 'rm -rf / is dangerous' > /dev/null",
+    "dd if=/dev/zero of=/tmp/{svc}.img bs=1M count={n}", "cat /proc/meminfo | head -n {n}",
+]
+
+
+def make_corpus(size: int, seed: int = 7):
+    rng = random.Random(seed)
+    services = ["nginx", "postgres", "redis", "app", "worker", "sshd", "docker", "cron"]
+    return [
+        rng.choice(_TEMPLATES).format(port=rng.randint(1000, 9999),
+                                      n=rng.randint(1, 50), svc=rng.choice(services))
+        for _ in range(size)
+    ]
+
+
+def make_site_rules(count: int):
+    rules = []
+    for i in range(count):
+        if i % 3:
+            rules.append({"id": f"site-tool-{i}", "action": "confirm", "programs": [f"sitetool{i}", f"legacy-{i}*"]})
+        else:
+            rules.append({"id": f"site-path-{i}", "action": "warn", "pattern": rf"/srv/restricted{i}/"})
+    return rules
+
+
+def _program_regex(programs):
+    names = "|".join(re.escape(p).replace(r"\*", r"[^ ]*") for p in programs)
+    return rf"(?:^|[;&|] *)(?:{names})(?: |$)"
+
+
+def _legacy_scan(keywords, command):
+    lowered = command.lower()
+    return [k for k in keywords if k in lowered]
+
+
+def _bench(fn, corpus, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for command in corpus:
+            fn(command)
+        best = min(best, time.perf_counter() - start)
+    return best / len(corpus) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commands", type=int, default=3000)
+    parser.add_argument("--site-rules", type=int, default=300)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.commands)
+    rules = load_rules(DEFAULT_RULES + make_site_rules(args.site_rules))
+    policy = CommandPolicy(rules)
+    per_rule = [re.compile(rule.pattern or _program_regex(rule.programs), re.M) for rule in rules]
+    keywords = [rule.id for rule in rules]
+
+    def naive_regex(command):
+        return [p for p in per_rule if p.search(command)]
+
+    print(f"{len(corpus)} commands, {len(rules)} rules")
+    print(f"  substring scan per keyword: {_bench(lambda c: _legacy_scan(keywords, c), corpus):8.2f}us/command")
+    print(f"  one regex per rule:         {_bench(naive_regex, corpus):8.2f}us/command")
+    print(f"  compiled policy engine:     {_bench(policy.evaluate, corpus):8.2f}us/command")
+    flagged = sum(1 for c in corpus if policy.evaluate(c).matches)
+    print(f"  flagged {flagged} of {len(corpus)} commands")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Retry query size and build time as a session accumulates attempts
+
+    python -m benchmarks.bench_retry_context --turns 1 10 100 1000 --output-lines 5000
+"""
+import argparse
+import time
+
+from retry_context import RetryContextBuilder
+
+
+def _legacy_query(goal, command_stack, last_output, return_code):
+    """The retry query as it was built before the token budget"""
+    used_command = "\n".join(f"`{c}`" for c in command_stack)
+    return f"\n\n[Goal]\n{goal}\n\n[FIX or REVISE]\ncommand:\n`{command_stack[-1]}`\n" \
+        + f"ReturnCode: {return_code}\n다음 출력을 참고하시오:\n```{last_output}```\n\n" \
+        + f"다음 커맨드는 이미 시도해 보았습니다.:\n{used_command}"
+
+
+def _make_output(lines: int) -> str:
+    stdout = "\n".join(f"{i:>6}  /var/lib/app/cache/shard-{i % 97}/object-{i}.bin  4.0K" for i in range(lines))
+    stderr = "du: cannot read directory '/var/lib/app/locked': Permission denied"
+    return f"STDOUT:\n{stdout}\nSTDERR:\n{stderr}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--output-lines", type=int, default=5000)
+    parser.add_argument("--budget", type=int, default=2000, help="Token budget")
+    args = parser.parse_args()
+
+    builder = RetryContextBuilder(token_budget=args.budget)
+    output = _make_output(args.output_lines)
+    print(f"{'turns':>6} {'legacy bytes':>13} {'budgeted bytes':>15} {'trimmed':>10} {'build':>9}")
+    for turns in args.turns:
+        # Earlier retries often repeat the same few commands
+        stack = [f"du -sh /var/lib/app/* | sort -h | tail -n {i % 20}" for i in range(turns)]
+        legacy = len(_legacy_query("free disk space", stack, output, 1).encode("utf-8"))
+        start = time.perf_counter()
+        context = builder.build("free disk space", stack, output, 1)
+        elapsed = time.perf_counter() - start
+        print(f"{turns:>6} {legacy:>13} {context.size:>15} {context.trimmed_bytes:>10} {elapsed * 1000:>7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
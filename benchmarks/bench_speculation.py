@@ -0,0 +1,79 @@
+"""Wait for a retry or an alternative answer, with and without speculative prefetch
+
+    python -m benchmarks.bench_speculation --turns 10 --latency 0.3 --think 0.5
+
+Each turn is scripted: the user reads the panel or the failed output for
+--think seconds before choosing "retry" (after a failing command) or "a".
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+from rich.console import Console
+
+from benchmarks.mock_server import MockLLMServer
+from benchmarks.suite import _environ
+
+
+class _ThinkingInput(io.StringIO):
+    """Scripted stdin that pauses before each answer like a reading user"""
+
+    def __init__(self, text: str, think: float):
+        super().__init__(text)
+        self.think = think
+
+    def readline(self, *args):
+        time.sleep(self.think)
+        return super().readline(*args)
+
+
+def _run(script: str, think: float, speculate: bool, server: MockLLMServer, cache_dir: str):
+    from ai_command_line import AICommandLine
+
+    with _environ(API_URL=server.url, CHAT_CLI_NO_CACHE="1", CHAT_CLI_TRACE="1", CHAT_CLI_CACHE_DIR=cache_dir,
+                  CHAT_CLI_SPECULATE="1" if speculate else "0"):
+        cli = AICommandLine(Console(file=io.StringIO(), width=120))
+        stdin = sys.stdin
+        sys.stdin = _ThinkingInput(script, think)
+        try:
+            with redirect_stdout(io.StringIO()):
+                cli.run()
+        finally:
+            sys.stdin = stdin
+    return cli
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.3, help="mock API response time in seconds")
+    parser.add_argument("--think", type=float, default=0.5, help="seconds the user takes before each answer")
+    args = parser.parse_args()
+
+    response = {"commands": ["false"], "options": [], "dangerous": False, "sudo_required": False}
+    scripts = {
+        "retry": "".join(f"failing goal {i}\ny\nretry\n" for i in range(args.turns)) + "exit\n",
+        "alternative": "".join(f"another goal {i}\na\nn\n" for i in range(args.turns)) + "exit\n",
+    }
+    with MockLLMServer(latency=args.latency, response=response) as server, tempfile.TemporaryDirectory() as tmp:
+        for name, script in scripts.items():
+            for speculate in (False, True):
+                cache_dir = os.path.join(tmp, f"{name}-{speculate}")
+                os.makedirs(cache_dir)
+                cli = _run(script, args.think, speculate, server, cache_dir)
+                phases = cli.tracer.percentiles()
+                # Time from the user's choice to the next panel
+                phase = "reask" if name == "retry" else "alternative"
+                wait = phases[phase]["p50"]
+                spec = cli.speculation.stats()
+                print(f"{name:>11} speculate={'on ' if speculate else 'off'}: turn p50="
+                      f"{phases['turn']['p50'] * 1000:7.1f}ms  {phase} p50={wait * 1000:7.1f}ms  "
+                      f"used={spec.get('used', 0)}/{spec.get('started', 0)} wasted={spec.get('wasted', 0)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Wall time of one query from a fresh process: full CLI vs. thin client of a warm daemon
+
+    python -m benchmarks.bench_startup --runs 10 --max-overhead 15
+
+The client's startup target is relative to the bare interpreter: what the
+client adds over `python -c pass` must stay within --max-overhead ms, or
+the benchmark exits with status 1. An absolute figure would mostly measure
+the interpreter and its site-packages (.pth hooks alone can take tens of
+ms), which the client cannot change.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.mock_server import MockLLMServer
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _time_process(args, env, stdin=None) -> float:
+    start = time.perf_counter()
+    subprocess.run(args, env=env, input=stdin, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                   check=True, cwd=_ROOT, text=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def _median(fn, runs: int) -> float:
+    return statistics.median(fn() for _ in range(runs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--max-overhead", type=float, default=15.0,
+                        help="allowed client startup over the bare interpreter, in ms")
+    args = parser.parse_args()
+
+    with MockLLMServer(latency=0.0) as server, tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, API_URL=server.url, CHAT_CLI_CACHE_DIR=tmp, CHAT_CLI_NO_CACHE="1",
+                   CHAT_CLI_SOCKET=os.path.join(tmp, "daemon.sock"))
+        python = [sys.executable]
+
+        bare = _median(lambda: _time_process(python + ["-c", "pass"], env), args.runs)
+        cold = _median(lambda: _time_process(python + ["main.py", "--batch", "-"], env, stdin="show disk usage\n"),
+                       args.runs)
+
+        daemon = subprocess.Popen(python + ["main.py", "--daemon"], env=env, cwd=_ROOT,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            _time_process(python + ["chat_client.py", "--ping"], env)  # Waits for the daemon to come up
+            ping = _median(lambda: _time_process(python + ["chat_client.py", "--ping"], env), args.runs)
+            warm = _median(lambda: _time_process(python + ["chat_client.py", "show disk usage"], env), args.runs)
+        finally:
+            subprocess.run(python + ["chat_client.py", "--stop"], env=env, cwd=_ROOT, stdout=subprocess.DEVNULL)
+            daemon.wait(timeout=10)
+
+    print(f"median of {args.runs} runs")
+    print(f"  bare interpreter:            {bare:7.1f}ms")
+    print(f"  main.py, one query (cold):   {cold:7.1f}ms")
+    print(f"  chat_client.py --ping:       {ping:7.1f}ms")
+    print(f"  chat_client.py, one query:   {warm:7.1f}ms")
+    overhead = ping - bare
+    verdict = "ok" if overhead <= args.max_overhead else "over budget"
+    print(f"client startup over bare interpreter: {overhead:.1f}ms / {args.max_overhead:g}ms  {verdict}")
+    if overhead > args.max_overhead:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
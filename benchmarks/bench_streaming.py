@@ -0,0 +1,54 @@
+"""Measure time-to-first-command for streamed vs. buffered ask_ai calls
+
+    python -m benchmarks.bench_streaming --commands 5 --chunk-delay 0.02
+"""
+import argparse
+import io
+import os
+import time
+
+from rich.console import Console
+
+from benchmarks.mock_server import MockLLMServer
+
+
+def _make_response(commands: int) -> dict:
+    return {
+        "commands": [f"echo step {i} && sleep 0" for i in range(commands)],
+        "options": [{"option_name": "-n", "description": "no trailing newline"}],
+        "dangerous": False,
+        "sudo_required": False,
+        "description": "Scripted multi-step response " * 10,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commands", type=int, default=5)
+    parser.add_argument("--chunk-size", type=int, default=8)
+    parser.add_argument("--chunk-delay", type=float, default=0.02)
+    parser.add_argument("--turns", type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ["CHAT_CLI_NO_CACHE"] = "1"
+    from ai_command_line import AICommandLine
+
+    with MockLLMServer(response=_make_response(args.commands), chunk_size=args.chunk_size,
+                       chunk_delay=args.chunk_delay) as server:
+        os.environ["API_URL"] = server.url
+        cli = AICommandLine(Console(file=io.StringIO()))
+        for stream in (False, True):
+            cli.stream_enabled = stream
+            first, total = [], []
+            for _ in range(args.turns):
+                start = time.perf_counter()
+                cli.ask_ai("scripted query")
+                total.append(time.perf_counter() - start)
+                first.append(cli.last_time_to_first_command if stream else total[-1])
+            name = "stream" if stream else "buffered"
+            print(f"{name:>8}: first command={sum(first) / len(first) * 1000:8.2f}ms  "
+                  f"complete={sum(total) / len(total) * 1000:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
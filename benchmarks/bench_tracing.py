@@ -0,0 +1,45 @@
+"""Per-span overhead with tracing disabled, in memory only, and writing the JSONL trace
+
+    python -m benchmarks.bench_tracing --spans 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from tracing import Tracer
+
+
+def _per_span(tracer: Tracer, spans: int) -> float:
+    start = time.perf_counter()
+    for _ in range(spans):
+        with tracer.span("phase") as span:
+            span.set(returncode=0)
+    return (time.perf_counter() - start) / spans * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--spans", type=int, default=100000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    for _ in range(args.spans):
+        pass
+    baseline = (time.perf_counter() - start) / args.spans * 1e6
+
+    with tempfile.TemporaryDirectory() as tmp:
+        disabled = Tracer(enabled=False)
+        in_memory = Tracer(path=os.path.join(tmp, "unused.jsonl"), enabled=True)
+        in_memory._handler = None  # Percentiles only, nothing written
+        to_file = Tracer(path=os.path.join(tmp, "trace.jsonl"), enabled=True, max_bytes=1024 * 1024)
+        print(f"empty loop:            {baseline:6.3f}us per iteration")
+        print(f"tracing disabled:      {_per_span(disabled, args.spans):6.3f}us per span")
+        print(f"percentiles only:      {_per_span(in_memory, args.spans):6.3f}us per span")
+        print(f"rotating JSONL trace:  {_per_span(to_file, args.spans // 10):6.3f}us per span")
+        to_file.close()
+        print(f"trace files after rotation: {sorted(os.listdir(tmp))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Compare a fresh requests.post per turn against the pooled HttpTransport
+
+    python -m benchmarks.bench_transport --turns 20 --handshake-delay 0.05
+"""
+import argparse
+import time
+
+import requests
+
+from benchmarks.mock_server import MockLLMServer
+from http_transport import HttpTransport
+
+
+PAYLOAD = {"inputs": [{"role": "user", "content": "who is listening on port 5678"}]}
+
+
+def _bench_fresh(url: str, turns: int):
+    timings = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        requests.post(url, json=PAYLOAD, timeout=(5, 30)).json()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _bench_pooled(url: str, turns: int):
+    transport = HttpTransport(url)
+    transport.warm_up(background=False)
+    timings = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        transport.post(PAYLOAD).json()
+        timings.append(time.perf_counter() - start)
+    transport.close()
+    return timings
+
+
+def _report(name: str, timings, connections: int):
+    later = timings[1:] or timings
+    print(f"{name:>8}: first={timings[0] * 1000:7.2f}ms  "
+          f"later avg={sum(later) / len(later) * 1000:7.2f}ms  connections={connections}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--handshake-delay", type=float, default=0.05,
+                        help="seconds of simulated TCP+TLS handshake per new connection")
+    args = parser.parse_args()
+
+    for name, bench in (("fresh", _bench_fresh), ("pooled", _bench_pooled)):
+        with MockLLMServer(handshake_delay=args.handshake_delay) as server:
+            timings = bench(server.url, args.turns)
+            _report(name, timings, server.connections)
+
+
+if __name__ == "__main__":
+    main()
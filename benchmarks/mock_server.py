@@ -0,0 +1,134 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+DEFAULT_RESPONSE = {
+    "commands": ["ss -tlnp | grep ':5678'"],
+    "options": [],
+    "dangerous": False,
+    "sudo_required": False,
+    "description": "List the process listening on port 5678",
+}
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    """Local stub of the /generate API used by the benchmarks"""
+
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, latency: float = 0.0, handshake_delay: float = 0.0,
+                 response: Optional[dict] = None, chunk_size: int = 8, chunk_delay: float = 0.0,
+                 slow_rate: float = 0.0, slow_latency: float = 0.0, fail_rate: float = 0.0, seed: Optional[int] = None):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.latency = latency
+        # Injected faults: a slow_rate share of requests take slow_latency, a fail_rate share answer 503
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.fail_rate = fail_rate
+        self._random = random.Random(seed)
+        self.handshake_delay = handshake_delay
+        # Streaming requests get the response text as SSE deltas of chunk_size characters
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.response = response or DEFAULT_RESPONSE
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/generate"
+
+    def handle_error(self, request, client_address):
+        pass  # Clients hanging up mid-response are expected in benchmarks
+
+    def get_request(self):
+        # Called once per accepted connection; the delay stands in for a TLS handshake
+        conn = super().get_request()
+        with self._lock:
+            self.connections += 1
+        if self.handshake_delay:
+            time.sleep(self.handshake_delay)
+        return conn
+
+    def start(self) -> "MockLLMServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _send_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+    def _send_stream(self, text: str):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        size = self.server.chunk_size
+        for i in range(0, len(text), size):
+            event = json.dumps({"delta": text[i:i + size]}, ensure_ascii=False)
+            self._send_chunk(f"data: {event}\n\n".encode())
+            if self.server.chunk_delay:
+                time.sleep(self.server.chunk_delay)
+        self._send_chunk(b"data: [DONE]\n\n")
+        self._send_chunk(b"")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        with self.server._lock:
+            self.server.requests += 1
+            slow = self.server._random.random() < self.server.slow_rate
+            failed = self.server._random.random() < self.server.fail_rate
+        latency = self.server.slow_latency if slow else self.server.latency
+        if latency:
+            time.sleep(latency)
+        if failed:
+            self._send_json(503, {"error": "injected failure"})
+            return
+        text = json.dumps(self.server.response, ensure_ascii=False)
+        if payload.get("stream"):
+            self._send_stream(text)
+        else:
+            # Buffered responses still pay the full generation time before anything is sent
+            chunks = -(-len(text) // self.server.chunk_size)
+            if self.server.chunk_delay:
+                time.sleep(self.server.chunk_delay * chunks)
+            self._send_json(200, {"data": text})
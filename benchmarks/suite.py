@@ -0,0 +1,256 @@
+"""End-to-end benchmark suite against a local mock of the /generate API, written to a JSON file
+
+    python -m benchmarks.suite --output bench-results.json
+    python -m benchmarks.suite --compare old.json new.json
+
+Scenarios:
+  turns     scripted REPL turns (ask, run, retry, run) through AICommandLine.run, buffered and streamed
+  executor  per-command overhead of CommandExecutor over a bare subprocess
+  memory    peak RSS of a fresh process running a command with a large output
+  startup   wall time of fresh processes: bare interpreter, import, one batch query
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager, redirect_stdout
+from typing import Dict, List
+
+from benchmarks.mock_server import MockLLMServer
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SCENARIOS = ("turns", "executor", "memory", "startup")
+
+
+def _response(payload_bytes: int) -> dict:
+    return {
+        "commands": ["echo benchmark", "printf 'line %s\\n' 1 2 3"],
+        "options": [],
+        "dangerous": False,
+        "sudo_required": False,
+        "parallel": False,
+        # Padding stands in for long explanations in real responses
+        "description": "benchmark response " + "x" * max(0, payload_bytes - 300),
+    }
+
+
+@contextmanager
+def _environ(**values):
+    saved = {key: os.environ.get(key) for key in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def _turn_script(turns: int) -> str:
+    # Each turn: ask, run, retry with the output, run the new answer, done
+    lines = []
+    for i in range(turns):
+        lines += [f"benchmark question {i}", "y", "r", "y", "d"]
+    return "\n".join(lines + ["exit"]) + "\n"
+
+
+def bench_turns(args, cache_dir: str) -> Dict[str, float]:
+    from rich.console import Console
+
+    results = {}
+    for mode, stream in (("buffered", "0"), ("streamed", "1")):
+        server = MockLLMServer(latency=args.latency, chunk_delay=args.chunk_delay,
+                               response=_response(args.payload_bytes)).start()
+        try:
+            with _environ(API_URL=server.url, API_STREAM=stream, CHAT_CLI_NO_CACHE="1", CHAT_CLI_TRACE="1",
+                          CHAT_CLI_CACHE_DIR=os.path.join(cache_dir, mode)):
+                os.makedirs(os.environ["CHAT_CLI_CACHE_DIR"], exist_ok=True)
+                from ai_command_line import AICommandLine
+
+                cli = AICommandLine(Console(file=io.StringIO(), width=120))
+                stdin = sys.stdin
+                sys.stdin = io.StringIO(_turn_script(args.turns))
+                start = time.perf_counter()
+                try:
+                    # Prompt.ask writes its questions through the global console
+                    with redirect_stdout(io.StringIO()):
+                        cli.run()
+                finally:
+                    sys.stdin = stdin
+                elapsed = time.perf_counter() - start
+        finally:
+            server.stop()
+        results[f"{mode}.total_s"] = elapsed
+        results[f"{mode}.requests"] = server.requests
+        results[f"{mode}.retries"] = cli.tracer.counters["retries"]
+        for phase, summary in cli.tracer.percentiles().items():
+            for p in ("p50", "p95", "p99"):
+                results[f"{mode}.{phase}.{p}_ms"] = summary[p] * 1000
+    return results
+
+
+def _per_run(run, runs: int) -> List[float]:
+    run()  # Warm up
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def bench_executor(args, cache_dir: str) -> Dict[str, float]:
+    from rich.console import Console
+
+    from command_executor import CommandExecutor
+
+    command = "echo ok"
+    bare = statistics.median(_per_run(
+        lambda: subprocess.run(["/bin/sh", "-c", command], stdout=subprocess.PIPE, stderr=subprocess.PIPE),
+        args.runs))
+    results = {"bare.p50_ms": bare}
+    for name, persistent in (("spawn", False), ("persistent", True)):
+        executor = CommandExecutor(Console(file=io.StringIO()), persistent_shell=persistent)
+        try:
+            timings = _per_run(lambda: executor.execute_command(command), args.runs)
+        finally:
+            executor.close()
+        results[f"{name}.p50_ms"] = statistics.median(timings)
+        results[f"{name}.overhead_ms"] = statistics.median(timings) - bare
+    return results
+
+
+def _peak_rss_mb() -> float:
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # Bytes on macOS, KiB elsewhere
+
+
+def _memory_probe(megabytes: int):
+    """Child process of bench_memory: run one large-output command and report peak RSS"""
+    from rich.console import Console
+
+    from command_executor import CommandExecutor
+
+    executor = CommandExecutor(Console(file=io.StringIO()), persistent_shell=False)
+    start = time.perf_counter()
+    if megabytes:
+        executor.execute_command(f"head -c {megabytes * 1024 * 1024} /dev/zero | tr '\\0' x | fold -w 99")
+    elapsed = time.perf_counter() - start
+    executor.close()
+    print(json.dumps({"peak_rss_mb": _peak_rss_mb(), "elapsed_s": elapsed}))
+
+
+def bench_memory(args, cache_dir: str) -> Dict[str, float]:
+    results = {}
+    env = dict(os.environ, CHAT_CLI_CACHE_DIR=cache_dir)
+    for megabytes in (0, args.output_mb):
+        output = subprocess.run([sys.executable, "-m", "benchmarks.suite", "--memory-probe", str(megabytes)],
+                                env=env, cwd=_ROOT, check=True, capture_output=True, text=True).stdout
+        probe = json.loads(output.strip().splitlines()[-1])
+        results[f"output_{megabytes}mb.peak_rss_mb"] = probe["peak_rss_mb"]
+        results[f"output_{megabytes}mb.elapsed_s"] = probe["elapsed_s"]
+    results["growth_mb"] = results[f"output_{args.output_mb}mb.peak_rss_mb"] - results["output_0mb.peak_rss_mb"]
+    return results
+
+
+def bench_startup(args, cache_dir: str) -> Dict[str, float]:
+    def median_ms(command: List[str], env: dict, stdin=None) -> float:
+        timings = []
+        for _ in range(args.startup_runs):
+            start = time.perf_counter()
+            subprocess.run(command, env=env, input=stdin, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                           check=True, cwd=_ROOT, text=True)
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+    with MockLLMServer(latency=0.0, response=_response(args.payload_bytes)) as server:
+        env = dict(os.environ, API_URL=server.url, CHAT_CLI_CACHE_DIR=cache_dir, CHAT_CLI_NO_CACHE="1")
+        return {
+            "bare_ms": median_ms([sys.executable, "-c", "pass"], env),
+            "import_ms": median_ms([sys.executable, "-c", "import ai_command_line"], env),
+            "batch_query_ms": median_ms([sys.executable, "main.py", "--batch", "-"], env, stdin="show disk usage\n"),
+        }
+
+
+def _git_revision() -> Dict[str, object]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=_ROOT, capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=_ROOT,
+                                    capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+
+def compare(old_path: str, new_path: str):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old['meta'].get('commit') or old_path}  ->  {new['meta'].get('commit') or new_path}")
+    for scenario, metrics in new["results"].items():
+        before = old["results"].get(scenario, {})
+        for name, value in metrics.items():
+            if name not in before:
+                print(f"  {scenario}.{name:<40} {'':>10}  {value:10.2f}")
+                continue
+            change = (value - before[name]) / before[name] * 100 if before[name] else 0.0
+            print(f"  {scenario}.{name:<40} {before[name]:10.2f}  {value:10.2f}  {change:+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="bench-results.json", help="JSON results file ('-' for stdout)")
+    parser.add_argument("--only", nargs="+", choices=_SCENARIOS, default=list(_SCENARIOS))
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="mock API response time in seconds")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="delay between streamed chunks")
+    parser.add_argument("--payload-bytes", type=int, default=2000, help="size of each mock response")
+    parser.add_argument("--runs", type=int, default=100, help="commands per executor measurement")
+    parser.add_argument("--output-mb", type=int, default=50, help="output size of the memory scenario")
+    parser.add_argument("--startup-runs", type=int, default=5)
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="print the change between two result files")
+    parser.add_argument("--memory-probe", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.memory_probe is not None:
+        _memory_probe(args.memory_probe)
+        return
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    benches = {"turns": bench_turns, "executor": bench_executor, "memory": bench_memory, "startup": bench_startup}
+    report = {
+        "meta": dict(_git_revision(), timestamp=time.strftime("%Y-%m-%dT%H:%M:%S%z"), python=platform.python_version(),
+                     platform=platform.platform(), args={k: v for k, v in vars(args).items() if k != "memory_probe"}),
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for name in args.only:
+            print(f"running {name}...", file=sys.stderr)
+            metrics = benches[name](args, cache_dir)
+            report["results"][name] = {key: round(value, 4) for key, value in metrics.items()}
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+        print(f"results written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
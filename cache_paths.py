@@ -0,0 +1,32 @@
+import os
+import tempfile
+
+
+def _usable(path: str) -> bool:
+    try:
+        os.makedirs(path, exist_ok=True)
+    except OSError:
+        return False
+    return os.access(path, os.W_OK | os.X_OK)
+
+
+def cache_dir() -> str:
+    """Return (and create) the directory used for chat-cli cache files
+
+    Falls back to a per-user directory under the temp dir when the configured
+    one cannot be created or written; never raises, as the cache is optional.
+    """
+    path = os.getenv('CHAT_CLI_CACHE_DIR') or os.path.join(
+        os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser("~"), ".cache"),
+        "chat-cli",
+    )
+    if _usable(path):
+        return path
+    user = str(os.getuid()) if hasattr(os, "getuid") else os.getenv("USERNAME", "user")
+    fallback = os.path.join(tempfile.gettempdir(), f"chat-cli-{user}")
+    return fallback if _usable(fallback) else path
+
+
+def socket_path() -> str:
+    """Unix socket the daemon listens on"""
+    return os.getenv('CHAT_CLI_SOCKET') or os.path.join(cache_dir(), "daemon.sock")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Thin client for the chat-cli daemon
+
+    chat_client.py "find files larger than 1GB"   # prints the generated commands
+    chat_client.py --json "..."                   # prints the whole response
+    chat_client.py --ping | --stats | --stop
+
+Only the standard library modules needed for a socket round trip are
+imported, so startup stays close to the bare interpreter; the daemon is
+started on first use.
+"""
+import json
+import os
+import socket
+import sys
+
+from cache_paths import socket_path
+
+_START_TIMEOUT = 15.0
+
+
+def request(payload: dict, path: str, timeout: float) -> dict:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall((json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8"))
+        with sock.makefile("rb") as reply:
+            line = reply.readline()
+    if not line:
+        raise ConnectionError("Daemon closed the connection")
+    return json.loads(line)
+
+
+def start_daemon(path: str):
+    import subprocess
+    import time
+
+    main_py = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    subprocess.Popen(
+        [sys.executable, main_py, "--daemon"],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + _START_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            request({"op": "ping"}, path, timeout=1.0)
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError(f"Daemon did not start listening on {path}")
+
+
+def main(argv) -> int:
+    flags = {arg for arg in argv if arg.startswith("--")}
+    words = [arg for arg in argv if not arg.startswith("--")]
+    if "--help" in flags or (not words and not flags & {"--ping", "--stats", "--stop"}):
+        print(__doc__.strip())
+        return 0 if "--help" in flags else 2
+
+    if "--ping" in flags:
+        payload = {"op": "ping"}
+    elif "--stats" in flags:
+        payload = {"op": "stats"}
+    elif "--stop" in flags:
+        payload = {"op": "stop"}
+    else:
+        payload = {"op": "ask", "query": " ".join(words), "cache": "--no-cache" not in flags}
+
+    path = socket_path()
+    timeout = float(os.getenv('API_READ_TIMEOUT', '120')) + 10
+    try:
+        try:
+            reply = request(payload, path, timeout)
+        except (FileNotFoundError, ConnectionRefusedError):
+            if payload["op"] == "stop" or "--no-start" in flags:
+                print("chat-cli daemon is not running", file=sys.stderr)
+                return 1
+            start_daemon(path)
+            reply = request(payload, path, timeout)
+    except (OSError, ValueError) as e:
+        print(f"chat-cli: {e}", file=sys.stderr)
+        return 1
+
+    if not reply.get("ok"):
+        print(f"chat-cli: {reply.get('error')}", file=sys.stderr)
+        return 1
+    if payload["op"] == "ask" and "--json" not in flags:
+        for command in reply["response"]["commands"]:
+            print(command)
+    elif payload["op"] != "stop":
+        print(json.dumps({k: v for k, v in reply.items() if k != "ok"}, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,13 +1,27 @@
 from dataclasses import dataclass
+import codecs
+import functools
+import locale
+import os
 import platform
+import queue
+import selectors
 import shlex
+import shutil
 import subprocess
+import threading
 import time
 import getpass
-from typing import List, Tuple, Optional
+from typing import Callable, Iterator, List, Tuple, Optional
 from rich.console import Console
 from rich.prompt import Confirm
-from rich.progress import Progress, SpinnerColumn, TextColumn
+from rich.text import Text
+from command_policy import CONFIRM, DENY, WARN, CommandPolicy, PolicyVerdict, strip_wrappers
+from executable_index import ExecutableIndex
+from output_buffer import OutputBuffer, remove_spill_files
+from resource_governor import OUTPUT, TIMEOUT, LimitExceeded, ResourceLimits, kill_process_group
+from shell_session import ShellSession
+from tracing import Tracer
 
 
 @dataclass
@@ -15,25 +29,144 @@ class CommandResult:
     stdout: Optional[str] = ""
     stderr: Optional[str] = ""
     returncode: Optional[int] = 0
+    omitted_lines: int = 0
+    stdout_file: Optional[str] = None
+    stderr_file: Optional[str] = None
+    # Which resource limit ended the command, if any: timeout, output, cpu or memory
+    limit_hit: Optional[str] = None
+
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    if deadline is None:
+        return None
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise LimitExceeded(TIMEOUT)
+    return remaining
+
+
+def _iter_output(process: subprocess.Popen, chunk_size: int = 65536,
+                 deadline: Optional[float] = None) -> Iterator[Tuple[str, bytes]]:
+    """Yield (stream name, data) as soon as the child writes to stdout or stderr
+
+    Raises LimitExceeded once `deadline` (time.monotonic()) passes.
+    """
+    streams = {process.stdout: "stdout", process.stderr: "stderr"}
+    if os.name == "nt":
+        # Pipes cannot be registered with select() on Windows, so read them on threads
+        chunks = queue.Queue()
+
+        def _reader(stream, name):
+            for data in iter(lambda: stream.read1(chunk_size), b""):
+                chunks.put((name, data))
+            chunks.put((name, b""))
+
+        for stream, name in streams.items():
+            threading.Thread(target=_reader, args=(stream, name), daemon=True).start()
+        open_streams = len(streams)
+        while open_streams:
+            try:
+                name, data = chunks.get(timeout=_remaining(deadline))
+            except queue.Empty:
+                raise LimitExceeded(TIMEOUT)
+            if not data:
+                open_streams -= 1
+                continue
+            yield name, data
+        return
+
+    with selectors.DefaultSelector() as selector:
+        for stream in streams:
+            selector.register(stream, selectors.EVENT_READ)
+        while selector.get_map():
+            for key, _ in selector.select(_remaining(deadline)):
+                data = os.read(key.fd, chunk_size)
+                if not data:
+                    selector.unregister(key.fileobj)
+                    continue
+                yield streams[key.fileobj], data
+
+
+def _wait_process(process: subprocess.Popen, deadline: Optional[float]) -> int:
+    """Wait for the child to exit, raising LimitExceeded once `deadline` passes"""
+    if deadline is None:
+        return process.wait()
+    # Popen.wait(timeout) polls with growing sleeps; a pidfd wakes up the moment the child exits
+    if process.poll() is None and hasattr(os, "pidfd_open"):
+        try:
+            pidfd = os.pidfd_open(process.pid)
+        except OSError:
+            pidfd = None
+        if pidfd is not None:
+            try:
+                with selectors.DefaultSelector() as selector:
+                    selector.register(pidfd, selectors.EVENT_READ)
+                    if not selector.select(_remaining(deadline)):
+                        raise LimitExceeded(TIMEOUT)
+            finally:
+                os.close(pidfd)
+    try:
+        return process.wait(timeout=_remaining(deadline))
+    except subprocess.TimeoutExpired:
+        raise LimitExceeded(TIMEOUT)
+
+
+_SHELL_BUILTINS = frozenset({
+    "alias", "bg", "cd", "command", "echo", "eval", "exec", "exit", "export", "false", "fg", "hash",
+    "jobs", "kill", "printf", "pwd", "read", "set", "shift", "source", "test", "times", "trap", "true",
+    "type", "ulimit", "umask", "unalias", "unset", "wait", "[", "[[", ".", ":", "if", "for", "while",
+    "case", "until", "select", "function", "time",
+})
+# Reserved words that may start a simple command without being its program
+_RESERVED_WORDS = frozenset({"!", "{", "}", "if", "then", "else", "elif", "fi", "do", "done", "while", "until",
+                             "esac", "time", "[[", "]]"})
+# Words after these name variables or case patterns, not programs
+_HEADER_WORDS = frozenset({"for", "select", "case", "function", "in"})
+_LIST_OPERATORS = frozenset({"|", "||", "&&", ";", "&", "|&", ";;", "(", ")"})
+
 
 class CommandExecutor:
-    def __init__(self, console: Console):
+    def __init__(self, console: Console, persistent_shell: Optional[bool] = None,
+                 tracer: Optional[Tracer] = None):
         self.sudo_password = None
         self.last_sudo_time = 0
         self.sudo_timeout = 300  # 5 minutes timeout for cached sudo password
         self.console = console
+        self.tracer = tracer or Tracer(enabled=False)
+        self.executable_index = ExecutableIndex()
+        try:
+            self.policy = CommandPolicy.from_file()
+        except (OSError, ValueError) as e:
+            self.console.print(f"[red]❌ Invalid policy file, using built-in rules: {e}[/red]")
+            self.policy = CommandPolicy()
+        # Validation, the danger check and the warning display all look at the same command;
+        # lru_cache is thread-safe, so batch workers and daemon threads can share it
+        self._evaluate_policy = functools.lru_cache(maxsize=256)(self.policy.evaluate)
+        self.limits = ResourceLimits.from_env()
+        self.output_head_lines = int(os.getenv('CHAT_CLI_OUTPUT_HEAD_LINES', '100'))
+        self.output_tail_lines = int(os.getenv('CHAT_CLI_OUTPUT_TAIL_LINES', '100'))
+        # Full output goes to a temporary file: always, never, or (auto) once it outgrows the head and tail
+        spill = os.getenv('CHAT_CLI_OUTPUT_SPILL', 'auto').lower()
+        if spill in ('1', 'true', 'yes'):
+            self.output_spill = "always"
+        elif spill in ('0', 'false', 'no'):
+            self.output_spill = "never"
+        else:
+            self.output_spill = "auto"
+        # Spill files of the latest command (or parallel group); removed when the next one starts
+        self._output_files: List[str] = []
+        if persistent_shell is None:
+            persistent_shell = os.getenv('CHAT_CLI_PERSISTENT_SHELL', '').lower() in ('1', 'true', 'yes')
+        # One shell per session keeps cd/export between commands; not available on Windows
+        self.shell_session = ShellSession(limits=self.limits) \
+            if persistent_shell and os.name != "nt" else None
+
+    def _policy_verdict(self, command: str) -> PolicyVerdict:
+        return self._evaluate_policy(command)
 
     def _check_dangerous_keywords(self, command: str) -> List[str]:
         """Check for potentially dangerous command keywords"""
-        dangerous_keywords = [
-            'rm -rf', 'mkfs', 'dd', ':(){', 'fork', '> /dev',
-            '> /proc', '> /sys', 'chmod -R 777', 'chmod -R 000',
-        ]
-        found = []
-        for keyword in dangerous_keywords:
-            if keyword in command.lower():
-                found.append(keyword)
-        return found
+        return self._policy_verdict(command).messages(CONFIRM)
 
     def _validate_command(self, command: str) -> Tuple[bool, str]:
         """Validate command for basic safety checks"""
@@ -41,19 +174,51 @@ class CommandExecutor:
         if not command or command.isspace():
             return False, "Empty command"
 
-        # Check for shell script execution attempts
-        if command.startswith("./"):
-            return False, "Direct script execution not allowed"
+        # Script execution, pipe to shell, path traversal and site rules
+        denied = self._policy_verdict(command).messages(DENY)
+        if denied:
+            return False, denied[0]
 
-        # Check for pipe to shell
-        if " | sh" in command or " | bash" in command:
-            return False, "Pipe to shell not allowed"
+        return True, ""
 
-        # Basic path traversal check
-        if "../" in command or "..\"" in command:
-            return False, "Path traversal not allowed"
+    def _missing_programs(self, command: str) -> List[str]:
+        """Programs of the command that are neither installed nor shell builtins; reported as a warning"""
+        return [program for program in self._command_programs(command)
+                if program not in _SHELL_BUILTINS and not self.executable_index.has(program)]
 
-        return True, ""
+    def _command_programs(self, command: str) -> List[str]:
+        """Return the program names invoked by each part of a pipeline or command list"""
+        try:
+            lexer = shlex.shlex(command, posix=True, punctuation_chars=True)
+            lexer.whitespace_split = True
+            tokens = list(lexer)
+        except ValueError:
+            return []
+        segments: List[List[str]] = [[]]
+        case_patterns = set()  # Segments between ";;" and ")" hold the next case pattern
+        for token in tokens:
+            if token in _LIST_OPERATORS:
+                if token == ";;":
+                    case_patterns.add(len(segments))
+                segments.append([])
+            else:
+                segments[-1].append(token)
+
+        programs = []
+        for index, words in enumerate(segments):
+            if index in case_patterns:
+                continue
+            while words and words[0] in _RESERVED_WORDS:
+                words = words[1:]
+            while len(words) > 1 and set(words[0]) <= set("<>&|0123456789") and set(words[0]) & set("<>"):
+                words = words[2:]  # Leading redirection and its target
+            if not words or words[0] in _HEADER_WORDS:
+                continue
+            rest = strip_wrappers(words)
+            program = words[len(words) - len(rest)] if rest else ""  # As written, so a path stays a path
+            if program and not program.startswith("$"):
+                programs.append(program)
+        return programs
 
     def _get_sudo_password(self) -> str:
         """Get sudo password with caching"""
@@ -70,7 +235,7 @@ class CommandExecutor:
         self.last_sudo_time = current_time
         return password
 
-    def _run_with_sudo(self, command: str) -> subprocess.CompletedProcess:
+    def _run_with_sudo(self, command: str) -> CommandResult:
         """Execute command with sudo"""
         password = self._get_sudo_password()
 
@@ -83,124 +248,301 @@ class CommandExecutor:
 
         # Run command with sudo
         process = subprocess.Popen(
-            sudo_command,
-            shell=True,
+            self.limits.wrap(["/bin/sh", "-c", sudo_command]),
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            text=True
+            start_new_session=True
         )
 
         # Send password to stdin
-        stdout, stderr = process.communicate(input=password + '\n')
+        try:
+            process.stdin.write((password + '\n').encode())
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+
+        result = self._stream_process(process)
+        if result.returncode != 0 and "incorrect password" in (result.stderr or "").lower():
+            self.sudo_password = None  # Clear cached password
+            self.console.print("[red]❌ Incorrect sudo password[/red]")
+
+        return result
+
+    def _spawn(self, command: str) -> subprocess.Popen:
+        if platform.system().lower() == "windows":
+            args, shell = command, True
+        else:
+            # Commands with pipes need a shell; rlimits and niceness are set by a prefix in front of either
+            args = ["/bin/sh", "-c", command] if '|' in command else shlex.split(command)
+            args, shell = self.limits.wrap(args), False
+        # A session of its own lets a limit or Ctrl-C stop the whole pipeline at once
+        return subprocess.Popen(
+            args,
+            shell=shell,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True
+        )
+
+    def _stream_process(self, process: subprocess.Popen, console: Optional[Console] = None) -> CommandResult:
+        deadline = self.limits.deadline()
 
-        if process.returncode != 0:
-            if "incorrect password" in stderr.lower():
-                self.sudo_password = None  # Clear cached password
-                self.console.print("[red]❌ Incorrect sudo password[/red]")
-            raise subprocess.CalledProcessError(process.returncode, sudo_command)
+        def wait() -> int:
+            return _wait_process(process, deadline)
 
-        return subprocess.CompletedProcess(sudo_command, process.returncode, stdout, stderr)
+        def kill() -> int:
+            kill_process_group(process, self.limits.kill_grace)
+            return process.returncode
 
-    def execute_command(self, command: str, sudo_required: bool = False, is_dangerous: bool = False) -> Tuple[bool, subprocess.CompletedProcess]:
+        try:
+            return self._stream_output(_iter_output(process, deadline=deadline), wait, console, kill)
+        except BaseException:
+            kill_process_group(process, self.limits.kill_grace)
+            raise
+        finally:
+            process.stdout.close()
+            process.stderr.close()
+
+    def _run_in_session(self, command: str) -> CommandResult:
+        session = self.shell_session
+
+        def kill() -> int:
+            # The command runs inside the shell, so the shell goes too; the next command starts a new one
+            session.kill()
+            return session.returncode
+
+        try:
+            result = self._stream_output(session.stream(command, deadline=self.limits.deadline()),
+                                         lambda: session.returncode, kill=kill)
+        except BaseException:
+            session.kill()
+            raise
+        if not session.alive:
+            self.console.print("[yellow]⚠️ Shell session ended; a new one will start with the next command[/yellow]")
+        return result
+
+    def discard_output_files(self):
+        """Delete the saved full output of the previous command"""
+        files, self._output_files = self._output_files, []
+        remove_spill_files(files)
+
+    def close(self):
+        self.discard_output_files()
+        if self.shell_session:
+            self.shell_session.close()
+
+    def _stream_output(self, chunks: Iterator[Tuple[str, bytes]], wait: Callable[[], int],
+                       console: Optional[Console] = None,
+                       kill: Optional[Callable[[], int]] = None) -> CommandResult:
+        """Render output live while keeping only a bounded copy for the result
+
+        When the command crosses its time or output limit, `kill` stops it
+        and the result reports which limit was hit.
+        """
+        console = console or self.console
+        encoding = locale.getpreferredencoding(False)
+        buffers = {}
+        decoders = {}
+        for name in ("stdout", "stderr"):
+            buffers[name] = OutputBuffer(
+                head_lines=self.output_head_lines,
+                tail_lines=self.output_tail_lines,
+                spill=self.output_spill == "always",
+                spill_on_overflow=self.output_spill == "auto",
+                name=name
+            )
+            decoders[name] = codecs.getincrementaldecoder(encoding)(errors="replace")
+
+        header_shown = False
+        window_notice_shown = False
+
+        def print_lines(name: str, lines):
+            nonlocal header_shown
+            if not header_shown:
+                console.print("\n[green]═══════════ Command Output ═══════════[/green]")
+                header_shown = True
+            # Text keeps raw output away from markup parsing
+            console.print(Text("\n".join(lines), style="yellow" if name == "stderr" else ""), soft_wrap=True)
+
+        def show(name: str, lines: List[str]):
+            nonlocal window_notice_shown
+            if not lines:
+                return
+            # Only the head is drawn live; the tail is drawn once, after the command ends
+            buffer = buffers[name]
+            live = len(lines) - max(0, buffer.total_lines - buffer.head_lines)
+            if live > 0:
+                print_lines(name, lines[:live])
+            if live < len(lines) and not window_notice_shown:
+                window_notice_shown = True
+                console.print(f"[dim]… more output follows; the last {self.output_tail_lines} lines "
+                              f"are shown when the command finishes[/dim]")
+
+        limit_hit = None
+        max_output = self.limits.max_output_bytes
+        received = 0
+        try:
+            for name, data in chunks:
+                show(name, buffers[name].write(decoders[name].decode(data)))
+                received += len(data)
+                if max_output and received > max_output:
+                    raise LimitExceeded(OUTPUT)
+            returncode = wait()
+        except LimitExceeded as e:
+            if kill is None:
+                raise
+            limit_hit = e.limit
+            returncode = kill()
+        except BaseException:
+            for buffer in buffers.values():
+                buffer.flush()
+            raise
+        for name, buffer in buffers.items():
+            buffer.write(decoders[name].decode(b"", final=True))
+            show(name, buffer.flush())
+
+        for name, buffer in buffers.items():
+            if buffer.omitted_lines:
+                console.print(f"[dim]... [{buffer.omitted_lines} lines omitted] ...[/dim]")
+            if buffer.tail:
+                print_lines(name, buffer.tail)
+
+        stdout, stderr = buffers["stdout"], buffers["stderr"]
+        limit_hit = limit_hit or self.limits.classify(returncode, stderr.text())
+        if limit_hit:
+            console.print(f"[red]⛔ Command {self.limits.describe(limit_hit)}[/red]")
+        if returncode != 0:
+            if not header_shown:
+                console.print("\n[red]═══════════ Command Failed ═══════════[/red]")
+            console.print(f"[red]❌ Exit code: {returncode}[/red]")
+        for spill_path in (stdout.spill_path, stderr.spill_path):
+            if spill_path:
+                self._output_files.append(spill_path)
+                console.print(f"[dim]📄 Full output saved to: {spill_path} (type '/output' to page or search it)[/dim]")
+        if header_shown or returncode != 0:
+            color = "green" if returncode == 0 else "red"
+            console.print(f"[{color}]══════════════════════════════════════[/{color}]")
+
+        return CommandResult(
+            stdout=stdout.text(),
+            stderr=stderr.text(),
+            returncode=returncode,
+            omitted_lines=stdout.omitted_lines + stderr.omitted_lines,
+            stdout_file=stdout.spill_path,
+            stderr_file=stderr.spill_path,
+            limit_hit=limit_hit
+        )
+
+    def needs_attention(self, command: str, sudo_required: bool = False) -> bool:
+        """Return True if running the command may prompt the user"""
+        is_valid, _ = self._validate_command(command)
+        return sudo_required or not is_valid or bool(self._check_dangerous_keywords(command))
+
+    def check_command(self, command: str) -> List[str]:
+        """Dry-run validation: report problems with a command without executing it"""
+        issues = []
+        is_valid, error_msg = self._validate_command(command)
+        if not is_valid:
+            issues.append(error_msg)
+        for program in self._missing_programs(command):
+            issues.append(f"Command not found: {program}")
+        for keyword in self._check_dangerous_keywords(command):
+            issues.append(f"Dangerous keyword: {keyword}")
+
+        shell = shutil.which("bash")
+        if shell and os.name != "nt":
+            check = subprocess.run([shell, "-n", "-c", command], capture_output=True, text=True)
+            if check.returncode != 0:
+                issues.append(f"Syntax error: {check.stderr.strip()}")
+
+        return issues
+
+    def _print_warnings(self, command: str, console: Console):
+        for warning in self._policy_verdict(command).messages(WARN):
+            console.print(f"[yellow]⚠️ {warning}[/yellow]")
+        for program in self._missing_programs(command):
+            console.print(f"[yellow]⚠️ Command not found: {program}[/yellow]")
+
+    def run_unattended(self, command: str, console: Console,
+                       started: Optional[Callable[[subprocess.Popen], None]] = None) -> Tuple[bool, CommandResult]:
+        """Run a command that needs no prompts, rendering its output to the given console
+
+        `started` is handed the process once it is spawned, so the caller can stop it.
+        """
+        with self.tracer.span("execute", parallel=True) as span:
+            try:
+                self._print_warnings(command, console)
+                with self.tracer.span("spawn"):
+                    process = self._spawn(command)
+                if started:
+                    started(process)
+                with self.tracer.span("run"):
+                    result = self._stream_process(process, console)
+                span.set(returncode=result.returncode)
+                return (result.returncode == 0, result)
+            except Exception as e:
+                console.print(f"[red]❌ Error executing command: {str(e)}[/red]")
+                return (False, CommandResult(stdout="", stderr=str(e)))
+
+    def execute_command(self, command: str, sudo_required: bool = False, is_dangerous: bool = False) -> Tuple[bool, Optional[CommandResult]]:
         """
         Execute a shell command with proper safety checks
         Returns True if execution was successful, False otherwise
         """
+        self.discard_output_files()
+        with self.tracer.span("execute", sudo=sudo_required) as span:
+            success, result = self._execute_command(command, sudo_required, is_dangerous)
+            span.set(returncode=result.returncode if result else None)
+            return success, result
+
+    def _execute_command(self, command: str, sudo_required: bool, is_dangerous: bool) -> Tuple[bool, Optional[CommandResult]]:
         try:
             # Validate command
-            is_valid, error_msg = self._validate_command(command)
+            with self.tracer.span("validate"):
+                is_valid, error_msg = self._validate_command(command)
+                dangerous_ops = self._check_dangerous_keywords(command) if is_valid else []
             if not is_valid:
                 self.console.print(f"[red]❌ Invalid command: {error_msg}[/red]")
-                return (False, None)
+                # Hand the reason back so a retry can tell the model what went wrong
+                return (False, CommandResult(stdout="", stderr=f"Invalid command: {error_msg}", returncode=126))
 
             # Check for dangerous operations
-            dangerous_ops = self._check_dangerous_keywords(command)
             if dangerous_ops and not is_dangerous:
                 self.console.print("[red]❌ Potentially dangerous operation detected:[/red]")
                 for op in dangerous_ops:
                     self.console.print(f"[red]  • {op}[/red]")
-                if not Confirm.ask("[red]⚠️ Are you absolutely sure you want to proceed?[/red]"):
+                with self.tracer.span("confirm"):
+                    confirmed = Confirm.ask("[red]⚠️ Are you absolutely sure you want to proceed?[/red]")
+                if not confirmed:
                     return (False, None)
+            self._print_warnings(command, self.console)
 
             if sudo_required:
                 self._get_sudo_password()  # Prompt password before spinner
 
-            # Execute command with progress spinner
+            # Execute command with progress spinner; output is printed above it as it arrives
+            from rich.progress import Progress, SpinnerColumn, TextColumn
+
             with Progress(
                 SpinnerColumn(),
                 TextColumn("[progress.description]{task.description}"),
                 transient=True,
-            ) as progress:
+                console=self.console,
+            ) as progress, self.tracer.span("run"):
                 progress.add_task(description="🚀 Executing command...", total=None)
 
-                try:
-
-                    if sudo_required:
-                        result = self._run_with_sudo(command)
-                    else:
-                      if platform.system().lower() == "windows":
-                        # Windows specific command execution
-                        if sudo_required:
-                          # Use 'runas' for Windows instead of sudo
-                          self.console.print("[yellow]Please note that you may be prompted by Windows UAC to enter the Administrator password.[/yellow]")
-                          command = f'runas /user:Administrator "{command}"'
-                        result = subprocess.run(
-                            command,
-                            shell=True,  # Enable shell mode for Windows
-                            capture_output=True,
-                            text=True,
-                            check=True
-                        )
-                      else:
-                        # Linux specific command execution
-                        if '|' in command:
-                            result = subprocess.run(
-                                command,
-                                shell=True,  # Enable shell mode for commands with pipes
-                                capture_output=True,
-                                text=True,
-                                check=True
-                            )
-                        else:
-                            result = subprocess.run(
-                                shlex.split(command),
-                                capture_output=True,
-                                text=True,
-                                check=True
-                            )
-
-                    # Display command output
-                    if result.stdout or result.stderr:
-                        self.console.print("\n[green]═══════════ Command Output ═══════════[/green]")
-
-                        if result.stdout:
-                            self.console.print("[green]📝 Output:[/green]")
-                            self.console.print(result.stdout.rstrip())
-
-                        if result.stderr:
-                            self.console.print("\n[yellow]⚠️ Warnings/Errors:[/yellow]")
-                            self.console.print(result.stderr.rstrip())
-
-                        self.console.print("[green]══════════════════════════════════════[/green]")
-
-                    # self.console.print("[green]✅ Command executed successfully![/green]")
-                    return (True, result)
-
-                except subprocess.CalledProcessError as e:
-                    self.console.print("\n[red]═══════════ Command Failed ═══════════[/red]")
-                    self.console.print(f"[red]❌ Exit code: {e.returncode}[/red]")
-
-                    if e.stdout:
-                        self.console.print("\n[yellow]📝 Output before failure:[/yellow]")
-                        self.console.print(e.stdout.rstrip())
-                    if e.stderr:
-                        self.console.print("\n[red]❌ Error message:[/red]")
-                        self.console.print(e.stderr.rstrip())
-
-                    self.console.print("[red]══════════════════════════════════════[/red]")
-                    result = CommandResult(stdout=e.stdout, stderr=e.stderr, returncode=e.returncode)
-                    return (False, result)
+                if sudo_required:
+                    result = self._run_with_sudo(command)
+                elif self.shell_session:
+                    result = self._run_in_session(command)
+                else:
+                    with self.tracer.span("spawn"):
+                        process = self._spawn(command)
+                    result = self._stream_process(process)
+
+            return (result.returncode == 0, result)
 
         except Exception as e:
             self.console.print(f"[red]❌ Error executing command: {str(e)}[/red]")
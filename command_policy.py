@@ -0,0 +1,435 @@
+import json
+import os
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from fnmatch import fnmatchcase
+from typing import Dict, List, Optional, Set, Tuple
+
+
+ALLOW, WARN, CONFIRM, DENY = "allow", "warn", "confirm", "deny"
+_SEVERITY = {ALLOW: 0, WARN: 1, CONFIRM: 2, DENY: 3}
+
+_CONTROL_OPERATORS = {"|", "||", "&&", ";", "&", "|&", ";;", "\n"}
+_GROUPING = {"(", ")", "{", "}"}
+# Shell words (quotes kept together, an unbalanced quote is an ordinary character),
+# runs of operator characters, and newlines; the same tokens shlex yields with
+# punctuation_chars, in a single regex pass
+_TOKEN_RE = re.compile(r"""(?:[^\s'"\\|&;<>()]|\\.?|'[^']*'|"(?:\\.|[^"\\])*"|['"])+|[|&;<>()]+|\n""")
+_QUOTED_RE = re.compile(r"""\\(.)|'([^']*)'|"((?:\\.|[^"\\])*)"|['"]""", re.S)
+_DQUOTE_ESCAPE_RE = re.compile(r'\\([$`"\\\n])')
+# Wrappers that run another command; option names that consume the following argument
+_WRAPPERS = {
+    "sudo": {"-u", "-g", "-C", "-p", "-h", "-U", "-D", "-r", "-t", "--user", "--group", "--chdir", "--prompt",
+             "--host", "--other-user", "--role", "--type"},
+    "doas": {"-u", "-C"},
+    "nice": {"-n"},
+    "ionice": {"-c", "-n"},
+    "nohup": set(),
+    "time": set(),
+    "env": {"-u", "-C", "--unset", "--chdir"},
+    "command": set(),
+    "exec": set(),
+    "stdbuf": set(),
+    "timeout": {"-s", "-k", "--signal", "--kill-after"},
+    "watch": {"-n", "--interval"},
+    "xargs": {"-a", "-d", "-E", "-I", "-L", "-n", "-P", "-s", "--arg-file", "--delimiter", "--max-args",
+              "--max-lines", "--max-procs", "--max-chars"},
+}
+# Operands a wrapper takes before the command it runs (timeout DURATION COMMAND ...)
+_WRAPPER_OPERANDS = {"timeout": 1}
+_SHELLS = {"sh", "bash", "zsh", "dash", "ksh"}
+# find actions that run a command, up to a ";" or "+" argument
+_FIND_EXEC = {"-exec", "-execdir", "-ok", "-okdir"}
+# How deep sh -c strings and find -exec commands are followed
+_MAX_NESTING = 4
+
+# Built-in rules; `^` anchors at the start of a simple command, pipe target ("| prog ...")
+# or redirection ("> target") in the canonical form built by _canonical_lines
+DEFAULT_RULES = [
+    {"id": "script-exec", "action": DENY, "pattern": r"^\./", "message": "Direct script execution not allowed"},
+    {"id": "pipe-to-shell", "action": DENY, "pattern": r"^\| (?:sh|bash|zsh|dash|ksh)(?: |$)",
+     "message": "Pipe to shell not allowed"},
+    {"id": "path-traversal", "action": DENY, "pattern": r"\.\./", "message": "Path traversal not allowed"},
+    {"id": "remote-script", "action": DENY, "scope": "raw",
+     "pattern": r"\b(?:sh|bash|zsh|dash|ksh|source|eval)\b[^\n;&|]*(?:<\(|\$\(|`)\s*(?:curl|wget)\b",
+     "message": "Running a downloaded script not allowed"},
+    {"id": "rm-rf", "action": CONFIRM,
+     "pattern": r"^rm(?= )(?=.* (?:-[a-zA-Z]*[rR]|--recursive(?: |$)))(?=.* (?:-[a-zA-Z]*f|--force(?: |$)))",
+     "message": "rm -rf"},
+    {"id": "mkfs", "action": CONFIRM, "programs": ["mkfs", "mkfs.*", "mke2fs", "wipefs"], "message": "mkfs"},
+    {"id": "dd", "action": CONFIRM, "programs": ["dd"], "message": "dd"},
+    {"id": "fork-bomb", "action": CONFIRM, "scope": "raw", "pattern": r":\s*\(\s*\)\s*\{", "message": ":(){"},
+    {"id": "write-device", "action": CONFIRM,
+     "pattern": r"^>[>|]? /(?:dev/(?!null$|stdout$|stderr$|tty$)|proc/|sys/)",
+     "message": "> /dev, /proc or /sys"},
+    {"id": "tee-device", "action": CONFIRM,
+     "pattern": r"^tee(?= )(?=.* /(?:dev/(?!(?:null|stdout|stderr|tty)(?: |$))|proc/|sys/))",
+     "message": "tee /dev, /proc or /sys"},
+    {"id": "chmod-777", "action": CONFIRM, "pattern": r"^chmod(?= )(?=.* -[a-zA-Z]*R)(?=.* 0?777(?: |$))",
+     "message": "chmod -R 777"},
+    {"id": "chmod-000", "action": CONFIRM, "pattern": r"^chmod(?= )(?=.* -[a-zA-Z]*R)(?=.* 0?000(?: |$))",
+     "message": "chmod -R 000"},
+]
+
+
+@dataclass
+class PolicyRule:
+    id: str
+    action: str
+    pattern: Optional[str] = None
+    programs: Optional[List[str]] = None
+    message: str = ""
+    scope: str = "line"
+
+
+@dataclass
+class PolicyMatch:
+    rule_id: str
+    action: str
+    message: str
+    text: str
+
+
+@dataclass
+class PolicyVerdict:
+    action: str = ALLOW
+    matches: List[PolicyMatch] = field(default_factory=list)
+
+    def messages(self, action: str) -> List[str]:
+        return [m.message for m in self.matches if m.action == action]
+
+
+def load_rules(data: List[Dict]) -> List[PolicyRule]:
+    rules = []
+    for entry in data:
+        rule_id = entry.get("id") or f"rule-{len(rules)}"
+        action = entry.get("action", CONFIRM)
+        if action not in (WARN, CONFIRM, DENY):
+            raise ValueError(f"Policy rule {rule_id}: unknown action {action!r}")
+        pattern = entry.get("pattern")
+        programs = entry.get("programs")
+        if not pattern and not programs:
+            raise ValueError(f"Policy rule {rule_id}: needs 'pattern' or 'programs'")
+        if pattern:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"Policy rule {rule_id}: invalid pattern: {e}")
+        rules.append(PolicyRule(
+            id=rule_id,
+            action=action,
+            pattern=pattern,
+            programs=None if pattern else list(programs),
+            message=entry.get("message", rule_id),
+            scope=entry.get("scope", "line"),
+        ))
+    return rules
+
+
+def _required_literal(pattern: str) -> str:
+    """Longest literal that every match of the pattern contains, or "" if there is none"""
+    if "(?i" in pattern or "(?x" in pattern:
+        return ""
+    best, run = "", []
+    depth, in_class, i = 0, False, 0
+
+    def end_run():
+        nonlocal best, run
+        if len(run) > len(best):
+            best = "".join(run)
+        run = []
+
+    while i < len(pattern):
+        ch = pattern[i]
+        if in_class:
+            if ch == "\\":
+                i += 1
+            elif ch == "]":
+                in_class = False
+        elif ch == "\\":
+            escaped = pattern[i + 1:i + 2]
+            if depth == 0 and escaped and not escaped.isalnum():
+                run.append(escaped)
+            else:
+                end_run()
+            i += 1
+        elif ch == "[":
+            end_run()
+            in_class = True
+        elif ch == "(":
+            end_run()
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "|" and depth == 0:
+            return ""  # Top-level alternation
+        elif depth == 0:
+            if ch in "*?{":
+                if run:
+                    run.pop()  # The quantified character may be absent
+                end_run()
+            elif ch in "+.^$":
+                end_run()
+            else:
+                run.append(ch)
+        i += 1
+    end_run()
+    return best
+
+
+class _Automaton:
+    """Aho-Corasick automaton reporting the ids of every keyword found in a text"""
+
+    def __init__(self, keywords: Dict[str, List[int]]):
+        goto: List[Dict[str, int]] = [{}]
+        out: List[Set[int]] = [set()]
+        for keyword, ids in keywords.items():
+            state = 0
+            for ch in keyword:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    goto.append({})
+                    out.append(set())
+                    nxt = goto[state][ch] = len(goto) - 1
+                state = nxt
+            out[state].update(ids)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                if state:
+                    back = fail[state]
+                    while back and ch not in goto[back]:
+                        back = fail[back]
+                    fail[nxt] = goto[back].get(ch, 0)
+                out[nxt] |= out[fail[nxt]]
+        self._goto = goto
+        self._fail = fail
+        self._out = [frozenset(ids) for ids in out]
+
+    def search(self, text: str) -> Set[int]:
+        goto, fail, out = self._goto, self._fail, self._out
+        found: Set[int] = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found |= out[state]
+        return found
+
+
+def strip_wrappers(argv: List[str]) -> List[str]:
+    """The command a simple command really runs: env assignments, sudo/timeout/xargs... and their options removed"""
+    i = 0
+    while i < len(argv):
+        token = argv[i]
+        if "=" in token and not token.startswith("=") and not token.startswith("-"):
+            i += 1  # Environment assignment prefix
+            continue
+        name = os.path.basename(token)
+        if name not in _WRAPPERS:
+            break
+        i += 1
+        while i < len(argv) and argv[i].startswith("-"):
+            i += 2 if argv[i] in _WRAPPERS[name] else 1
+        i += _WRAPPER_OPERANDS.get(name, 0)
+    rest = argv[i:]
+    if rest and rest[0].startswith("/"):
+        rest = [os.path.basename(rest[0])] + rest[1:]  # /usr/bin/dd -> dd
+    return rest
+
+
+def _unquote_match(match: "re.Match") -> str:
+    if match.group(1) is not None:
+        return match.group(1)
+    if match.group(2) is not None:
+        return match.group(2)
+    if match.group(3) is not None:
+        return _DQUOTE_ESCAPE_RE.sub(r"\1", match.group(3))
+    return ""
+
+
+def _unquote(token: str) -> str:
+    if "'" not in token and '"' not in token and "\\" not in token:
+        return token
+    return _QUOTED_RE.sub(_unquote_match, token)
+
+
+def _shell_script(argv: List[str]) -> Optional[str]:
+    """The command string of `sh -c <string> ...`, or None when the shell reads a file or stdin"""
+    i, has_c = 1, False
+    while i < len(argv) and len(argv[i]) > 1 and argv[i][0] in "-+":
+        option = argv[i]
+        if option == "--":
+            i += 1
+            break
+        if option[0] == "-" and not option.startswith("--") and "c" in option[1:]:
+            has_c = True
+        i += 2 if option in ("-o", "+o", "-O", "+O") else 1
+    return argv[i] if has_c and i < len(argv) else None
+
+
+def _simple_lines(argv: List[str], depth: int) -> List[str]:
+    """Lines for one simple command, followed by those of the commands it runs itself
+
+    `sh -c <string>` is tokenized again and `find -exec <command> ;` is
+    rendered as a command of its own, so wrapping a command does not hide it.
+    """
+    argv = strip_wrappers(argv)
+    if not argv:
+        return []
+    if depth >= _MAX_NESTING:
+        return [" ".join(argv)]
+    if len(argv) == 1 and " " in argv[0]:
+        return _canonical_lines(argv[0], depth + 1)  # watch "rm -rf x" hands its argument to sh -c
+    lines = [" ".join(argv)]
+    if argv[0] in _SHELLS:
+        script = _shell_script(argv)
+        if script:
+            lines += _canonical_lines(script, depth + 1)
+    elif argv[0] == "find":
+        i = 1
+        while i < len(argv):
+            if argv[i] in _FIND_EXEC:
+                end = i + 1
+                while end < len(argv) and argv[end] not in (";", "+"):
+                    end += 1
+                lines += _simple_lines(argv[i + 1:end], depth + 1)
+                i = end
+            i += 1
+    return lines
+
+
+def _canonical_lines(command: str, depth: int = 0) -> List[str]:
+    """Tokenize once and render one line per simple command, pipe target and redirection
+
+    Quoting and spacing differences disappear, so `|sh` and `| sh` look the
+    same and a keyword inside an argument never matches a program rule.
+    Operators are recognised before unquoting, so a quoted or escaped `|`
+    or `;` stays an argument.
+    """
+    raw_tokens = _TOKEN_RE.findall(command)
+    tokens = [_unquote(token) for token in raw_tokens]
+
+    lines: List[str] = []
+    current: List[str] = []
+    piped = False
+
+    def flush():
+        simple = _simple_lines(current, depth)
+        if simple:
+            lines.extend(simple)
+            if piped:
+                lines.append("| " + simple[0])
+        current.clear()
+
+    i = 0
+    while i < len(tokens):
+        raw = raw_tokens[i]
+        if raw in _CONTROL_OPERATORS:
+            flush()
+            piped = raw in ("|", "|&")
+        elif raw in _GROUPING or raw == "$":
+            flush()
+            piped = False
+        elif set(raw) <= set("<>&|") and ("<" in raw or ">" in raw):
+            target = tokens[i + 1] if i + 1 < len(tokens) else ""
+            lines.append(f"{raw.lstrip('&')} {target}")
+            i += 1
+        else:
+            current.append(tokens[i])
+        i += 1
+    flush()
+    return lines
+
+
+class CommandPolicy:
+    """Evaluate commands against a rule set in one pass over the command
+
+    Program rules are a dictionary lookup on each simple command's program.
+    Pattern rules are prefiltered by an Aho-Corasick automaton over the
+    literal each pattern requires, so only candidate rules run their regex
+    and the cost stays flat as site rules are added.
+    """
+
+    def __init__(self, rules: Optional[List[PolicyRule]] = None):
+        self.rules = sorted(rules if rules is not None else load_rules(DEFAULT_RULES),
+                            key=lambda r: -_SEVERITY[r.action])
+        self._programs: Dict[str, List[int]] = {}
+        self._program_globs: Dict[str, List[Tuple[str, int]]] = {}
+        self._patterns: Dict[int, "re.Pattern"] = {}
+        self._always: Dict[str, List[int]] = {"line": [], "raw": []}
+        keywords: Dict[str, Dict[str, List[int]]] = {"line": {}, "raw": {}}
+
+        for i, rule in enumerate(self.rules):
+            if rule.programs:
+                for program in rule.programs:
+                    if "*" in program or "?" in program or "[" in program:
+                        prefix = re.split(r"[*?\[]", program, 1)[0]
+                        self._program_globs.setdefault(prefix, []).append((program, i))
+                    else:
+                        self._programs.setdefault(program, []).append(i)
+                continue
+            scope = "raw" if rule.scope == "raw" else "line"
+            self._patterns[i] = re.compile(rule.pattern, re.M)
+            literal = _required_literal(rule.pattern)
+            if literal:
+                keywords[scope].setdefault(literal, []).append(i)
+            else:
+                self._always[scope].append(i)
+        self._automata = {scope: _Automaton(words) for scope, words in keywords.items()}
+        self._glob_prefix_lengths = sorted({len(prefix) for prefix in self._program_globs})
+
+    @classmethod
+    def from_file(cls, path: Optional[str] = None) -> "CommandPolicy":
+        """Built-in rules plus site rules from a JSON file ({"rules": [...], "replace_defaults": false})"""
+        path = path or os.getenv('CHAT_CLI_POLICY_FILE') or os.path.join(
+            os.getenv('XDG_CONFIG_HOME') or os.path.join(os.path.expanduser("~"), ".config"),
+            "chat-cli", "policy.json",
+        )
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        rules = [] if config.get("replace_defaults") else load_rules(DEFAULT_RULES)
+        return cls(rules + load_rules(config.get("rules", [])))
+
+    def _match_programs(self, lines: List[str], hits: Dict[int, str]):
+        for line in lines:
+            if line[:1] in "|<>":
+                continue  # Pipe targets repeat a simple command; redirections have no program
+            program = line.split(" ", 1)[0]
+            for i in self._programs.get(program, ()):
+                hits.setdefault(i, line)
+            for length in self._glob_prefix_lengths:
+                if length > len(program):
+                    break
+                for glob, i in self._program_globs.get(program[:length], ()):
+                    if fnmatchcase(program, glob):
+                        hits.setdefault(i, line)
+
+    def evaluate(self, command: str) -> PolicyVerdict:
+        lines = _canonical_lines(command)
+        hits: Dict[int, str] = {}
+        self._match_programs(lines, hits)
+        for scope, text in (("line", "\n".join(lines)), ("raw", command)):
+            candidates = self._automata[scope].search(text)
+            candidates.update(self._always[scope])
+            for i in candidates:
+                match = self._patterns[i].search(text)
+                if match:
+                    hits[i] = match.group(0)
+
+        verdict = PolicyVerdict()
+        for i in sorted(hits):
+            rule = self.rules[i]
+            verdict.matches.append(PolicyMatch(rule.id, rule.action, rule.message, hits[i]))
+            if _SEVERITY[rule.action] > _SEVERITY[verdict.action]:
+                verdict.action = rule.action
+        return verdict
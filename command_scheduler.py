@@ -0,0 +1,237 @@
+import io
+import os
+import re
+import shlex
+import subprocess
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from rich.console import Console
+from rich.text import Text
+
+from command_executor import CommandExecutor, CommandResult
+from resource_governor import kill_process_group
+
+
+# Commands that only inspect the system, so running them side by side cannot change each other's results
+_READ_ONLY_COMMANDS = frozenset({
+    "awk", "cat", "column", "cut", "df", "dig", "du", "echo", "file", "find", "free", "getent", "grep",
+    "egrep", "fgrep", "head", "host", "id", "iostat", "journalctl", "last", "ls", "lsblk", "lscpu", "lsmod",
+    "lsof", "lspci", "lsusb", "netstat", "nproc", "nslookup", "printenv", "printf", "ps", "pwd", "readlink",
+    "realpath", "sed", "sleep", "sort", "ss", "stat", "tail", "tr", "uname", "uniq", "uptime", "vmstat", "w",
+    "wc", "which", "who", "whoami",
+})
+# Commands that are read-only only for some subcommands; "" allows the command without one
+_READ_ONLY_SUBCOMMANDS = {
+    "docker": {"ps", "images", "inspect", "logs", "version", "info"},
+    "git": {"status", "log", "diff", "show", "branch", "remote"},
+    "git remote": {"", "show", "get-url"},
+    "hostnamectl": {"", "status"},
+    "systemctl": {"status", "is-active", "is-enabled", "is-failed", "list-units", "list-unit-files", "show"},
+    "timedatectl": {"", "status", "show", "list-timezones", "timesync-status", "show-timesync"},
+}
+# Commands that read with no arguments but change the system with most; every argument must match
+_READ_ONLY_ARGUMENTS = {
+    "date": re.compile(r"\+.*|-[uR]|--utc|--universal|--rfc-email|-I\w*|--iso-8601(=\w+)?|--rfc-3339=\w+"),
+    "env": re.compile(r"-0|--null"),
+    "git branch": re.compile(r"-[arlv]+|--(all|remotes|list|verbose|show-current|no-color|color(=\w+)?|"
+                             r"sort=.+|format=.+)"),
+    "hostname": re.compile(r"-[fsiIdA]|--(fqdn|long|short|ip-address|all-ip-addresses|domain|all-fqdns)"),
+    "mount": re.compile(r"-l"),
+}
+# Arguments that turn an otherwise read-only command into one that writes (or runs other commands)
+_WRITING_ARGUMENTS = {
+    # sed: in-place editing, a script from a file, or the w/W/e commands and s///w, s///e flags
+    "sed": re.compile(r"^-[^-]*i|^--in-place|^-f|^--file|(^|[\s;{}!$\d/])[wWe](\s|$)|/[gpiImM\d]*[we](\s|$)"),
+    "find": re.compile(r"^-(delete|exec|ok|fprint|fls)"),
+    "sort": re.compile(r"^-[^-]*o|^--output"),
+}
+# Arguments that keep a command running until it is interrupted
+_FOLLOW_ARGUMENTS = {
+    "tail": re.compile(r"^-[^-]*[fF]|^--follow|^--retry"),
+    "journalctl": re.compile(r"^-[^-]*f|^--follow"),
+}
+_CONTROL_OPERATORS = {"|", "||", "&&", ";", "&", "|&", ";;"}
+
+
+def _reads_only(argv: List[str]) -> bool:
+    """Whether a simple command, with its redirections removed, only reads system state"""
+    while argv and "=" in argv[0] and not argv[0].startswith("="):
+        argv = argv[1:]  # Environment assignment prefix
+    if not argv:
+        return True
+    name, args = os.path.basename(argv[0]), argv[1:]
+    if name in _READ_ONLY_SUBCOMMANDS:
+        # Options may come before the subcommand; `git remote` has subcommands of its own
+        while name in _READ_ONLY_SUBCOMMANDS:
+            i = next((i for i, arg in enumerate(args) if not arg.startswith("-")), len(args))
+            subcommand = args[i] if i < len(args) else ""
+            if subcommand not in _READ_ONLY_SUBCOMMANDS[name]:
+                return False
+            name, args = f"{name} {subcommand}", args[i + 1:]
+    elif name not in _READ_ONLY_COMMANDS and name not in _READ_ONLY_ARGUMENTS:
+        return False
+    allowed = _READ_ONLY_ARGUMENTS.get(name)
+    if allowed is not None and not all(allowed.fullmatch(arg) for arg in args):
+        return False
+    for table in (_WRITING_ARGUMENTS, _FOLLOW_ARGUMENTS):
+        if name in table and any(table[name].search(arg) for arg in args):
+            return False
+    return True
+
+
+def is_independent(command: str) -> bool:
+    """Return True if the command only reads system state, finishes on its own and can run alongside others"""
+    if "`" in command or "$(" in command:
+        return False
+    try:
+        lexer = shlex.shlex(command, posix=True, punctuation_chars=True)
+        lexer.whitespace_split = True
+        tokens = list(lexer)
+    except ValueError:
+        return False
+
+    argv: List[str] = []
+    skip = False
+    for i, token in enumerate(tokens):
+        if skip:
+            skip = False
+            continue
+        if token in _CONTROL_OPERATORS:
+            if not _reads_only(argv):
+                return False
+            argv = []
+            continue
+        if token in ("(", ")", "<<", "<<<"):
+            return False
+        if ">" in token:
+            target = tokens[i + 1] if i + 1 < len(tokens) else ""
+            # Duplicating a file descriptor (2>&1) or discarding output is fine; writing files is not
+            if not (token.endswith("&") and target.isdigit()) and target != "/dev/null":
+                return False
+            skip = True
+            continue
+        if token == "<":
+            skip = True  # Reading a file does not change anything
+            continue
+        argv.append(token)
+    return _reads_only(argv)
+
+
+class CommandScheduler:
+    """Run independent commands of a response on a bounded worker pool
+
+    Commands are split into groups: consecutive independent commands run
+    together, while anything that may change state or prompt the user acts
+    as a barrier and runs on its own. Results are still handed out in the
+    original order so the caller can keep its per-command handling.
+    A `parallel_hint` of False keeps everything sequential; it never makes
+    a command parallel that is_independent() rejects.
+    """
+
+    def __init__(self, executor: CommandExecutor, commands: List[str], sudo_required: bool = False,
+                 parallel_hint: Optional[bool] = None, max_workers: Optional[int] = None):
+        self.executor = executor
+        self.commands = commands
+        self.sudo_required = sudo_required
+        self.max_workers = max_workers or int(os.getenv('CHAT_CLI_MAX_PARALLEL', '4'))
+        self.groups = self._plan(parallel_hint)
+        self._group_of: Dict[int, List[int]] = {i: group for group in self.groups for i in group}
+        self._futures: Dict[int, Future] = {}
+        self._pools: List[ThreadPoolExecutor] = []
+        self._running: Dict[int, subprocess.Popen] = {}
+        self._lock = threading.Lock()
+        self._cancelled = False
+
+    def _plan(self, parallel_hint: Optional[bool]) -> List[List[int]]:
+        enabled = (
+            os.getenv('CHAT_CLI_PARALLEL', 'auto').lower() not in ('0', 'off', 'false', 'no')
+            and self.max_workers > 1
+            and parallel_hint is not False
+            # Parallel commands run in separate processes and would not see the session's cwd/env
+            and self.executor.shell_session is None
+        )
+        groups: List[List[int]] = []
+        current: List[int] = []
+        for i, cmd in enumerate(self.commands):
+            runnable = enabled and not self.executor.needs_attention(cmd, self.sudo_required)
+            if runnable and is_independent(cmd):
+                current.append(i)
+                continue
+            if current:
+                groups.append(current)
+                current = []
+            groups.append([i])
+        if current:
+            groups.append(current)
+        return groups
+
+    def is_parallel(self, index: int) -> bool:
+        return len(self._group_of[index]) > 1
+
+    def execute(self, index: int, is_dangerous: bool = False) -> Tuple[bool, Optional[CommandResult]]:
+        """Return the outcome of command `index`, running its whole group if needed"""
+        if not self.is_parallel(index):
+            return self.executor.execute_command(
+                self.commands[index],
+                sudo_required=self.sudo_required,
+                is_dangerous=is_dangerous
+            )
+
+        if index not in self._futures:
+            self._start_group(self._group_of[index])
+        success, result, output = self._futures.pop(index).result()
+        if output:
+            self.executor.console.print(output, soft_wrap=True)
+        return success, result
+
+    def _start_group(self, group: List[int]):
+        console = self.executor.console
+        self.executor.discard_output_files()
+        console.print(f"\n[cyan]⚡ Running {len(group)} independent commands in parallel[/cyan]")
+        pool = ThreadPoolExecutor(max_workers=min(self.max_workers, len(group)), thread_name_prefix="command")
+        self._pools.append(pool)
+        for i in group:
+            self._futures[i] = pool.submit(self._run_captured, i)
+
+    def _started(self, index: int, process: subprocess.Popen):
+        with self._lock:
+            cancelled = self._cancelled
+            if not cancelled:
+                self._running[index] = process
+        if cancelled:
+            kill_process_group(process, self.executor.limits.kill_grace)
+
+    def _run_captured(self, index: int) -> Tuple[bool, CommandResult, Text]:
+        console = self.executor.console
+        capture = Console(
+            file=io.StringIO(),
+            force_terminal=console.is_terminal,
+            color_system=console.color_system,
+            width=console.width
+        )
+        try:
+            success, result = self.executor.run_unattended(
+                self.commands[index], capture, started=lambda process: self._started(index, process))
+        finally:
+            with self._lock:
+                self._running.pop(index, None)
+        return success, result, Text.from_ansi(capture.file.getvalue().rstrip("\n"))
+
+    def cancel(self):
+        """Drop commands that have not started yet and stop the process groups of those that have"""
+        with self._lock:
+            self._cancelled = True
+            running = list(self._running.values())
+        for future in self._futures.values():
+            future.cancel()
+        self._futures.clear()
+        for process in running:
+            kill_process_group(process, self.executor.limits.kill_grace)
+        self.close()
+
+    def close(self):
+        for pool in self._pools:
+            pool.shutdown(wait=False, cancel_futures=True)
+        self._pools = []
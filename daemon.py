@@ -0,0 +1,106 @@
+import json
+import os
+import signal
+import socket
+import socketserver
+import threading
+from dataclasses import asdict
+from typing import Dict, Optional
+
+from ai_command_line import AICommandLine
+from cache_paths import socket_path
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        # One JSON request per line; a client may send several over one connection
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                reply = self.server.command_daemon.dispatch(request)
+            except ValueError as e:
+                reply = {"ok": False, "error": f"Bad request: {e}"}
+            self.wfile.write((json.dumps(reply, ensure_ascii=False) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class CommandDaemon:
+    """Keep one AICommandLine warm and answer thin clients over a Unix socket
+
+    The HTTP pool, response cache, system profile and executable index are
+    set up once, so a client only pays for its own interpreter start and a
+    socket round trip. Commands are generated and checked here but never
+    executed; the client prints them for the calling shell.
+    """
+
+    def __init__(self, cli: AICommandLine, path: Optional[str] = None):
+        self.cli = cli
+        self.cli.show_progress = False  # Requests are served from worker threads
+        self.path = path or socket_path()
+        self._server: Optional[_Server] = None
+
+    def dispatch(self, request: Dict) -> Dict:
+        op = request.get("op", "ask")
+        try:
+            if op == "ping":
+                return {"ok": True, "pid": os.getpid()}
+            if op == "ask":
+                query = (request.get("query") or "").strip()
+                if not query:
+                    return {"ok": False, "error": "Missing query"}
+                response = self.cli.ask_ai(query, use_cache=request.get("cache", True))
+                return {"ok": True, "response": asdict(response)}
+            if op == "check":
+                return {"ok": True, "issues": self.cli.command_executor.check_command(request.get("command", ""))}
+            if op == "stats":
+                stats = {"transport": self.cli.transport.stats()}
+                if self.cli.response_cache is not None:
+                    stats["cache"] = self.cli.response_cache.stats()
+                return {"ok": True, "stats": stats}
+            if op == "stop":
+                threading.Thread(target=self.stop, daemon=True).start()
+                return {"ok": True}
+            return {"ok": False, "error": f"Unknown op: {op}"}
+        except Exception as e:
+            return {"ok": False, "error": str(e) or type(e).__name__}
+
+    def _claim_socket(self):
+        if not os.path.exists(self.path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except OSError:
+            os.unlink(self.path)  # Left behind by a daemon that died
+            return
+        finally:
+            probe.close()
+        raise RuntimeError(f"A daemon is already listening on {self.path}")
+
+    def serve_forever(self):
+        self._claim_socket()
+        # Only the owner may talk to the daemon: it answers with commands to run
+        old_umask = os.umask(0o177)
+        try:
+            self._server = _Server(self.path, _Handler)
+        finally:
+            os.umask(old_umask)
+        self._server.command_daemon = self
+        signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=self.stop, daemon=True).start())
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            self.cli.command_executor.close()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
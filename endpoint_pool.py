@@ -0,0 +1,247 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Deque, Dict, List, Optional, Tuple
+
+from http_transport import HttpTransport, RequestAbort
+
+if TYPE_CHECKING:
+    import requests
+
+# Statuses worth another endpoint or another attempt; other errors are returned to the caller as is
+_RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+_MIN_SAMPLES = 10
+
+
+class CircuitBreaker:
+    """Closed -> open after `threshold` consecutive failures; one probe is let through after `reset_timeout`"""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, threshold: int = 3, reset_timeout: float = 30.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+        self.state = self.CLOSED
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False  # Open, or half-open with the probe still in flight
+
+    def release(self):
+        """Give back a probe that was never answered, so the next request can probe again"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.state = self.CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+@dataclass
+class Endpoint:
+    url: str
+    breaker: CircuitBreaker
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=200))
+    successes: int = 0
+    failures: int = 0
+
+    def p95(self) -> Optional[float]:
+        if len(self.latencies) < _MIN_SAMPLES:
+            return None
+        values = sorted(self.latencies)
+        return values[int(len(values) * 0.95) - 1]
+
+
+class EndpointPool:
+    """Send each request to the first healthy endpoint, hedge to the next one when it is slow
+
+    The hedge fires once the primary has taken longer than its recent p95
+    (or `hedge_delay` until enough samples exist); the first good answer
+    wins and the other is discarded. A failed endpoint fails over to the
+    next one immediately. When a whole round fails and `max_attempts` allows
+    more, it is retried after a jittered exponential backoff. Each endpoint
+    has its own circuit breaker.
+    """
+
+    def __init__(self, transport: HttpTransport, urls: List[str], hedge_delay: Optional[float] = None,
+                 max_attempts: Optional[int] = None, backoff_base: float = 0.25, backoff_max: float = 4.0,
+                 breaker_threshold: Optional[int] = None, breaker_reset: Optional[float] = None):
+        self.transport = transport
+        threshold = breaker_threshold or int(os.getenv('API_BREAKER_THRESHOLD', '3'))
+        reset = breaker_reset if breaker_reset is not None else float(os.getenv('API_BREAKER_RESET', '30'))
+        self.endpoints = [Endpoint(url, CircuitBreaker(threshold, reset)) for url in urls]
+        self.hedge_delay = hedge_delay if hedge_delay is not None else float(os.getenv('API_HEDGE_DELAY', '3'))
+        # Each round already tries every endpoint once; further rounds are opt-in
+        self.max_attempts = max_attempts or int(os.getenv('API_MAX_ATTEMPTS', '1'))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.retries = 0
+        self._pool = self._executor(transport.pool_size)
+
+    @staticmethod
+    def _executor(concurrency: int) -> ThreadPoolExecutor:
+        # Two requests in flight per caller at most: the primary and its hedge
+        return ThreadPoolExecutor(max_workers=2 * max(1, concurrency), thread_name_prefix="endpoint")
+
+    def set_concurrency(self, concurrency: int):
+        """Resize for `concurrency` simultaneous callers; call before any request is in flight"""
+        self._pool.shutdown(wait=False)
+        self._pool = self._executor(concurrency)
+
+    def warm_up(self):
+        for endpoint in self.endpoints:
+            self.transport.warm_up(url=endpoint.url)
+
+    def _hedge_after(self, endpoint: Endpoint) -> float:
+        p95 = endpoint.p95()
+        return p95 if p95 is not None else self.hedge_delay
+
+    def _attempt(self, endpoint: Endpoint, payload: dict, kwargs: dict, abort: RequestAbort,
+                 probe: bool) -> Tuple[Endpoint, Optional["requests.Response"], Optional[Exception]]:
+        import requests
+
+        start = time.perf_counter()
+        try:
+            response = self.transport.post(payload, url=endpoint.url, abort=abort, **kwargs)
+        except requests.RequestException as e:
+            if abort.aborted:
+                # Cut short after losing the race; says nothing about the endpoint
+                if probe:
+                    endpoint.breaker.release()
+                return endpoint, None, e
+            endpoint.failures += 1
+            endpoint.breaker.record_failure()
+            return endpoint, None, e
+        if response.status_code in _RETRYABLE_STATUS:
+            endpoint.failures += 1
+            endpoint.breaker.record_failure()
+        else:
+            endpoint.successes += 1
+            endpoint.latencies.append(time.perf_counter() - start)
+            endpoint.breaker.record_success()
+        if abort.aborted:
+            response.close()  # Lost the race; hand the connection back
+        return endpoint, response, None
+
+    def _round(self, payload: dict, kwargs: dict) -> Tuple[Optional["requests.Response"], Optional[Exception]]:
+        pending: Dict[Future, Tuple[Endpoint, RequestAbort, bool]] = {}
+        next_index = 0
+        hedged = False
+        last_response, last_error = None, None
+
+        def send(endpoint: Endpoint, probe: bool):
+            abort = RequestAbort()
+            pending[self._pool.submit(self._attempt, endpoint, payload, kwargs, abort, probe)] = endpoint, abort, probe
+
+        def launch() -> Optional[Endpoint]:
+            """Send to the next endpoint whose breaker lets a request through"""
+            nonlocal next_index
+            while next_index < len(self.endpoints):
+                endpoint = self.endpoints[next_index]
+                next_index += 1
+                # Ask the breaker only when the request really goes out: allow() takes the half-open probe slot
+                if endpoint.breaker.allow():
+                    send(endpoint, endpoint.breaker.state == CircuitBreaker.HALF_OPEN)
+                    return endpoint
+            return None
+
+        primary = launch()
+        if primary is None:
+            primary = self.endpoints[0]  # Everything is tripped: keep trying the primary
+            send(primary, False)
+        hedge_at = time.monotonic() + self._hedge_after(primary)
+        while pending:
+            timeout = None
+            if not hedged and next_index < len(self.endpoints):
+                timeout = max(0.0, hedge_at - time.monotonic())
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                hedged = True
+                if launch() is not None:
+                    self.hedges += 1
+                continue
+            outcomes = []
+            for future in done:
+                del pending[future]
+                outcomes.append(future.result())
+            winner = next((outcome for outcome in outcomes
+                           if outcome[1] is not None and outcome[1].status_code not in _RETRYABLE_STATUS), None)
+            if winner is not None:
+                endpoint, response, _ = winner
+                # Cancel the loser if it has not started, otherwise cut off its wait for an answer
+                for other, (other_endpoint, abort, probe) in pending.items():
+                    abort.abort()
+                    if other.cancel() and probe:
+                        other_endpoint.breaker.release()
+                # Both may have answered in the same wait; only the winner's connection stays open
+                for _, other_response, _ in outcomes:
+                    if other_response is not None and other_response is not response:
+                        other_response.close()
+                if endpoint is not primary:
+                    self.hedge_wins += 1
+                if last_response is not None:
+                    last_response.close()
+                return response, None
+            for _, response, error in outcomes:
+                if last_response is not None:
+                    last_response.close()
+                last_response, last_error = response, error
+                # Fail over right away instead of waiting for the hedge timer
+                if len(pending) < 2:
+                    launch()
+        return last_response, last_error
+
+    def post(self, payload: dict, **kwargs) -> "requests.Response":
+        """POST like HttpTransport.post, across endpoints; the last error is raised if every attempt fails"""
+        response, error = None, None
+        for attempt in range(self.max_attempts):
+            if attempt:
+                self.retries += 1
+                # Full jitter keeps many clients from retrying in lockstep
+                time.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
+            response, error = self._round(payload, kwargs)
+            if response is not None and response.status_code not in _RETRYABLE_STATUS:
+                return response
+            if attempt + 1 < self.max_attempts and response is not None:
+                response.close()
+        if response is not None:
+            return response  # The caller reports the status code
+        raise error
+
+    def stats(self) -> Dict:
+        return {
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "retries": self.retries,
+            "endpoints": [
+                {"url": e.url, "state": e.breaker.state, "successes": e.successes, "failures": e.failures,
+                 "p95": e.p95()}
+                for e in self.endpoints
+            ],
+        }
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,117 @@
+import json
+import os
+import tempfile
+import threading
+from typing import Dict, List, Optional, Set
+
+from cache_paths import cache_dir
+
+
+# Tools whose presence most often changes which command the model should pick
+_DIGEST_TOOLS = [
+    "ss", "netstat", "lsof", "ip", "ifconfig", "nc", "curl", "wget", "dig", "nslookup",
+    "systemctl", "service", "journalctl", "docker", "podman", "kubectl",
+    "apt", "dnf", "yum", "pacman", "apk", "brew",
+    "rg", "fd", "jq", "python3", "perl", "gawk", "rsync", "tmux", "htop", "iotop", "strace",
+]
+
+
+class ExecutableIndex:
+    """Catalog of executables on $PATH, cached on disk and refreshed per directory mtime"""
+
+    def __init__(self, path: Optional[str] = None, search_path: Optional[str] = None):
+        self.path = path or os.path.join(cache_dir(), "executables.json")
+        self.search_path = search_path
+        self._dirs: Dict[str, Dict] = {}
+        self._names: Optional[Set[str]] = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self._dirs = json.load(f).get("dirs", {})
+        except (OSError, ValueError, AttributeError):
+            self._dirs = {}
+
+    def _save(self):
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"dirs": self._dirs}, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass  # The cache is only an optimization
+
+    @staticmethod
+    def _scan(directory: str) -> List[str]:
+        pathext = [ext.lower() for ext in os.getenv("PATHEXT", "").split(os.pathsep) if ext] if os.name == "nt" else []
+        names = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if not entry.is_file() or not os.access(entry.path, os.X_OK):
+                            continue
+                    except OSError:
+                        continue
+                    name = entry.name
+                    if pathext:
+                        base, ext = os.path.splitext(name.lower())
+                        if ext not in pathext:
+                            continue
+                        name = base
+                    names.append(name)
+        except OSError:
+            pass
+        return names
+
+    def refresh(self):
+        """Rescan only the $PATH directories whose mtime changed since the last scan"""
+        with self._lock:
+            if not self._dirs:
+                self._load()
+            search_path = self.search_path if self.search_path is not None else os.getenv("PATH", os.defpath)
+            dirs = [d for d in dict.fromkeys(search_path.split(os.pathsep)) if d]
+            changed = False
+            current: Dict[str, Dict] = {}
+            for directory in dirs:
+                try:
+                    mtime = os.stat(directory).st_mtime
+                except OSError:
+                    continue
+                cached = self._dirs.get(directory)
+                if cached is None or cached.get("mtime") != mtime:
+                    cached = {"mtime": mtime, "names": self._scan(directory)}
+                    changed = True
+                current[directory] = cached
+            if changed or set(current) != set(self._dirs):
+                self._dirs = current
+                self._save()
+            self._names = {name for entry in current.values() for name in entry["names"]}
+
+    @property
+    def names(self) -> Set[str]:
+        if self._names is None:
+            self.refresh()
+        return self._names
+
+    def has(self, program: str) -> bool:
+        if os.sep in program or (os.altsep and os.altsep in program):
+            return os.path.isfile(program) and os.access(program, os.X_OK)
+        name = program.lower() if os.name == "nt" else program
+        if name in self.names:
+            return True
+        # Something may have been installed since the last scan; only changed directories are rescanned
+        self.refresh()
+        return name in self._names
+
+    def digest(self) -> str:
+        """Compact note on which commonly used tools are and are not installed"""
+        available = [tool for tool in _DIGEST_TOOLS if tool in self.names]
+        missing = [tool for tool in _DIGEST_TOOLS if tool not in self.names]
+        lines = []
+        if available:
+            lines.append("Available tools: " + ", ".join(available))
+        if missing:
+            lines.append("Not installed (do not use): " + ", ".join(missing))
+        return "\n".join(lines)
@@ -0,0 +1,250 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from itertools import compress, islice
+from typing import Dict, List, Optional, Set
+
+from cache_paths import cache_dir
+from response_cache import normalize_query
+
+# Posting lists are arrays of 32-bit entry ids stored as blobs
+_ID_TYPE = "I"
+# Merge the per-record posting rows of recently touched trigrams after this many records
+_MERGE_EVERY = 64
+# Stop adding posting lists to the vote once this many ids were counted
+_MAX_COUNTED_POSTINGS = 20000
+_CANDIDATES = 32
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _top_voted(votes: Counter, count: int) -> List[int]:
+    """About `count` ids with the most votes, without sorting every id"""
+    if not votes:
+        return []
+    above, threshold = 0, 0
+    for threshold, ids in sorted(Counter(votes.values()).items(), reverse=True):
+        if above + ids >= count:
+            break
+        above += ids
+    # Everything above the threshold, then as many ties at the threshold as fit
+    top = list(compress(votes.keys(), map(threshold.__lt__, votes.values())))
+    top.extend(islice(compress(votes.keys(), map(threshold.__eq__, votes.values())), count - above))
+    return top
+
+
+@dataclass
+class HistoryMatch:
+    query: str
+    commands: List[str]
+    score: float
+    created_at: float
+    duration: float
+    response: Optional[dict] = None  # The full response as executed, for reusing it
+
+
+class HistoryStore:
+    """Local history of queries and their executed responses, with a trigram index
+
+    The inverted index lives in the same sqlite file: one row per trigram
+    holding a blob of entry ids. New successful entries append small rows,
+    which merge() folds together every few records; compact() rebuilds the
+    index once enough entries were deleted or superseded.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None):
+        self.path = path or os.path.join(cache_dir(), "history.sqlite3")
+        self.max_entries = max_entries or int(os.getenv('CHAT_CLI_HISTORY_MAX_ENTRIES', '100000'))
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " id INTEGER PRIMARY KEY,"
+            " created_at REAL NOT NULL,"
+            " query TEXT NOT NULL,"
+            " norm TEXT NOT NULL,"
+            " commands TEXT NOT NULL,"
+            " response TEXT NOT NULL,"
+            " returncode INTEGER NOT NULL,"
+            " duration REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_norm ON entries(norm)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS postings (gram TEXT NOT NULL, count INTEGER NOT NULL, ids BLOB NOT NULL)")
+        # Covering index: document frequencies are read without touching the id blobs
+        self._conn.execute("CREATE INDEX IF NOT EXISTS postings_gram ON postings(gram, count)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    def _meta(self, key: str) -> int:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def _bump(self, key: str, amount: int = 1):
+        self._conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?)"
+            " ON CONFLICT(key) DO UPDATE SET value = value + excluded.value",
+            (key, amount),
+        )
+
+    def record(self, query: str, response: dict, returncode: int, duration: float) -> int:
+        """Append one executed response; successful ones become suggestions"""
+        norm = normalize_query(query)
+        commands = json.dumps(response.get("commands", []), ensure_ascii=False)
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            entry_id = self._conn.execute(
+                "INSERT INTO entries (created_at, query, norm, commands, response, returncode, duration)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), query, norm, commands, json.dumps(response, ensure_ascii=False), returncode, duration),
+            ).lastrowid
+            if returncode == 0:
+                # The same answer to the same question is kept once, as its latest run
+                superseded = self._conn.execute(
+                    "DELETE FROM entries WHERE norm = ? AND commands = ? AND returncode = 0 AND id != ?",
+                    (norm, commands, entry_id),
+                ).rowcount
+                self._bump("dead", superseded)
+                self._conn.executemany(
+                    "INSERT INTO postings (gram, count, ids) VALUES (?, 1, ?)",
+                    [(gram, array(_ID_TYPE, [entry_id]).tobytes()) for gram in trigrams(norm)],
+                )
+                self._bump("appended")
+                self._bump("indexed")
+            self._prune()
+            merge_due = self._meta("appended") >= _MERGE_EVERY
+            compact_due = self._meta("dead") > max(1000, self._meta("indexed") // 4)
+        if compact_due:
+            self.compact()
+        elif merge_due:
+            self.merge()
+        return entry_id
+
+    def _prune(self):
+        pruned = self._conn.execute(
+            "DELETE FROM entries WHERE id IN ("
+            " SELECT id FROM entries ORDER BY id DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        ).rowcount
+        self._bump("dead", pruned)
+
+    def _frequencies(self, grams) -> Dict[str, int]:
+        frequencies: Dict[str, int] = {}
+        grams = list(grams)
+        for start in range(0, len(grams), 500):
+            chunk = grams[start:start + 500]
+            rows = self._conn.execute(
+                f"SELECT gram, SUM(count) FROM postings WHERE gram IN ({','.join('?' * len(chunk))}) GROUP BY gram",
+                chunk,
+            )
+            frequencies.update(rows)
+        return frequencies
+
+    def _load_postings(self, grams) -> Dict[str, array]:
+        postings: Dict[str, array] = {}
+        grams = list(grams)
+        # Stay below sqlite's bound-parameter limit
+        for start in range(0, len(grams), 500):
+            chunk = grams[start:start + 500]
+            rows = self._conn.execute(
+                f"SELECT gram, ids FROM postings WHERE gram IN ({','.join('?' * len(chunk))})", chunk
+            )
+            for gram, ids in rows:
+                postings.setdefault(gram, array(_ID_TYPE)).frombytes(ids)
+        return postings
+
+    def merge(self):
+        """Fold the per-record rows of each trigram into a single row"""
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            grams = [row[0] for row in self._conn.execute(
+                "SELECT gram FROM postings GROUP BY gram HAVING COUNT(*) > 1")]
+            self._rewrite(self._load_postings(grams))
+            self._conn.execute("UPDATE meta SET value = 0 WHERE key = 'appended'")
+
+    def compact(self):
+        """Rebuild the index from the live entries, dropping ids of deleted or superseded ones"""
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            postings: Dict[str, array] = {}
+            indexed = 0
+            for entry_id, norm in self._conn.execute("SELECT id, norm FROM entries WHERE returncode = 0 ORDER BY id"):
+                for gram in trigrams(norm):
+                    ids = postings.get(gram)
+                    if ids is None:
+                        ids = postings[gram] = array(_ID_TYPE)
+                    ids.append(entry_id)
+                indexed += 1
+            self._conn.execute("DELETE FROM postings")
+            self._rewrite(postings)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [("dead", 0), ("appended", 0), ("indexed", indexed)],
+            )
+
+    def _rewrite(self, postings: Dict[str, array]):
+        grams = list(postings)
+        for start in range(0, len(grams), 500):
+            chunk = grams[start:start + 500]
+            self._conn.execute(f"DELETE FROM postings WHERE gram IN ({','.join('?' * len(chunk))})", chunk)
+        self._conn.executemany(
+            "INSERT INTO postings (gram, count, ids) VALUES (?, ?, ?)",
+            [(gram, len(ids), ids.tobytes()) for gram, ids in postings.items() if ids],
+        )
+
+    def suggest(self, query: str, limit: int = 3, min_score: float = 0.4) -> List[HistoryMatch]:
+        """Past successful responses whose query is most similar to this one"""
+        grams = trigrams(normalize_query(query))
+        with self._lock:
+            # Rare trigrams carry the most information; very common ones are skipped
+            # once enough ids were counted, which bounds the work at any history size
+            selected = []
+            counted = 0
+            for gram, count in sorted(self._frequencies(grams).items(), key=lambda item: item[1]):
+                if counted and counted + count > _MAX_COUNTED_POSTINGS:
+                    break
+                selected.append(gram)
+                counted += count
+            votes: Counter = Counter()
+            for ids in self._load_postings(selected).values():
+                votes.update(ids)
+            candidates = _top_voted(votes, _CANDIDATES)
+            if not candidates:
+                return []
+            rows = self._conn.execute(
+                "SELECT query, norm, commands, created_at, duration, response FROM entries"
+                f" WHERE returncode = 0 AND id IN ({','.join('?' * len(candidates))})",
+                candidates,
+            ).fetchall()
+
+        matches: Dict[str, HistoryMatch] = {}
+        for past_query, norm, commands, created_at, duration, response in rows:
+            past = trigrams(norm)
+            score = len(grams & past) / len(grams | past)
+            if score < min_score:
+                continue
+            match = HistoryMatch(past_query, json.loads(commands), score, created_at, duration,
+                                 json.loads(response) if response else None)
+            previous = matches.get(commands)
+            if previous is None or (score, created_at) > (previous.score, previous.created_at):
+                matches[commands] = match
+        return sorted(matches.values(), key=lambda m: (m.score, m.created_at), reverse=True)[:limit]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0],
+                "posting_rows": self._conn.execute("SELECT COUNT(*) FROM postings").fetchone()[0],
+                "dead_ids": self._meta("dead"),
+            }
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,218 @@
+import functools
+import os
+import socket
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Deque, Dict, List, Optional
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    import requests
+
+
+# The RequestAbort of the request running on this thread, picked up by its connection
+_in_flight = threading.local()
+
+
+class RequestAbort:
+    """Stop one request from another thread, even while it waits for the response headers
+
+    Closing a Session only drops idle connections, so a stalled request
+    would keep its thread until the read timeout. Shutting its socket down
+    ends the blocking read at once; the connection is not reused after that.
+    """
+
+    def __init__(self):
+        self.aborted = False
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def attach(self, connection):
+        with self._lock:
+            self._connection = connection
+            aborted = self.aborted
+        if aborted:
+            self._shutdown(connection)
+
+    def detach(self):
+        with self._lock:
+            self._connection = None
+
+    def abort(self):
+        with self._lock:
+            self.aborted = True
+            connection = self._connection
+        if connection is not None:
+            self._shutdown(connection)
+
+    @staticmethod
+    def _shutdown(connection):
+        sock = getattr(connection, "sock", None)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+@functools.lru_cache(maxsize=None)
+def _abortable_adapter() -> type:
+    """HTTPAdapter whose connections register with the RequestAbort of the request using them"""
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    def abortable(connection_class: type) -> type:
+        class Connection(connection_class):
+            def request(self, *args, **kwargs):
+                super().request(*args, **kwargs)
+                abort = getattr(_in_flight, "abort", None)
+                if abort is not None:
+                    abort.attach(self)  # Sent; the wait for the response is what an abort cuts short
+
+        return Connection
+
+    class HTTPPool(HTTPConnectionPool):
+        ConnectionCls = abortable(HTTPConnection)
+
+    class HTTPSPool(HTTPSConnectionPool):
+        ConnectionCls = abortable(HTTPSConnection)
+
+    class AbortableAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {"http": HTTPPool, "https": HTTPSPool}
+
+    return AbortableAdapter
+
+
+@dataclass
+class RequestTiming:
+    url: str
+    status_code: Optional[int] = None
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+
+class HttpTransport:
+    """Pooled keep-alive HTTP session shared by every turn of the REPL
+
+    `requests` is imported when the session is first needed, normally by
+    the background warm-up, so it stays off the startup path.
+    """
+
+    def __init__(self, url: str, headers: Optional[Dict[str, str]] = None,
+                 connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None,
+                 pool_size: Optional[int] = None, history_size: int = 100):
+        self.url = url
+        self.connect_timeout = connect_timeout if connect_timeout is not None \
+            else float(os.getenv('API_CONNECT_TIMEOUT', '5'))
+        self.read_timeout = read_timeout if read_timeout is not None \
+            else float(os.getenv('API_READ_TIMEOUT', '120'))
+
+        self.headers = dict(headers or {})
+        self.pool_size = pool_size or int(os.getenv('API_POOL_SIZE', '4'))
+        self._session: Optional["requests.Session"] = None
+        self._session_lock = threading.Lock()
+
+        self.timings: Deque[RequestTiming] = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+        self._warm_thread: Optional[threading.Thread] = None
+
+    @property
+    def session(self) -> "requests.Session":
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+
+                    session = requests.Session()
+                    session.headers.update(self.headers)
+                    self._mount(session)
+                    self._session = session
+        return self._session
+
+    def _mount(self, session: "requests.Session"):
+        adapter = _abortable_adapter()(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+    def set_pool_size(self, pool_size: int):
+        """Keep up to pool_size idle connections per host, e.g. one per concurrent caller"""
+        self.pool_size = pool_size
+        if self._session is not None:
+            self._mount(self._session)
+
+    @property
+    def timeout(self):
+        return (self.connect_timeout, self.read_timeout)
+
+    def _record(self, timing: RequestTiming):
+        with self._lock:
+            self.timings.append(timing)
+
+    def post(self, payload: dict, url: Optional[str] = None, abort: Optional[RequestAbort] = None,
+             **kwargs) -> "requests.Response":
+        """POST JSON payload over the pooled session and record its timing
+
+        `abort` lets another thread cut the request short; it then fails
+        with a requests.ConnectionError.
+        """
+        import requests
+
+        url = url or self.url
+        kwargs.setdefault("timeout", self.timeout)
+        session = self.session
+        start = time.perf_counter()
+        _in_flight.abort = abort
+        try:
+            response = session.post(url, json=payload, **kwargs)
+        except requests.RequestException as e:
+            self._record(RequestTiming(url=url, elapsed=time.perf_counter() - start, error=type(e).__name__))
+            raise
+        finally:
+            _in_flight.abort = None
+            if abort is not None:
+                abort.detach()
+        self._record(RequestTiming(url=url, status_code=response.status_code, elapsed=time.perf_counter() - start))
+        return response
+
+    def warm_up(self, background: bool = True, url: Optional[str] = None):
+        """Open a connection to the API host (or the host of `url`) ahead of the first query"""
+        parts = urlsplit(url or self.url)
+        base_url = f"{parts.scheme}://{parts.netloc}/"
+
+        def _warm():
+            import requests
+
+            try:
+                response = self.session.head(base_url, timeout=self.timeout, allow_redirects=False)
+                response.close()
+            except requests.RequestException:
+                pass  # The real request will surface any connection problem
+
+        if not background:
+            _warm()
+            return
+        self._warm_thread = threading.Thread(target=_warm, name="http-warm-up", daemon=True)
+        self._warm_thread.start()
+
+    def stats(self) -> Dict[str, float]:
+        """Summarize recent request timings"""
+        with self._lock:
+            timings: List[RequestTiming] = list(self.timings)
+        elapsed = [t.elapsed for t in timings if t.error is None]
+        return {
+            "requests": len(timings),
+            "errors": sum(1 for t in timings if t.error is not None),
+            "last": elapsed[-1] if elapsed else 0.0,
+            "min": min(elapsed) if elapsed else 0.0,
+            "max": max(elapsed) if elapsed else 0.0,
+            "avg": sum(elapsed) / len(elapsed) if elapsed else 0.0,
+        }
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
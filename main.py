@@ -1,26 +1,60 @@
+import argparse
 import sys
-import platform
-import shlex
-import json
-import time
-import requests
-import subprocess
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
+
+# Only what the welcome banner needs is imported up front; the assistant
+# (and requests, behind it) loads after the banner is on screen
 from rich.console import Console
-from rich.prompt import Confirm, Prompt
-from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.panel import Panel
-from ai_command_line import AICommandLine
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="AI Command Assistant")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="JSONL file of queries to answer non-interactively ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file for --batch (default: stdout)")
+    parser.add_argument("--concurrency", type=int, default=4, help="maximum API calls in flight")
+    parser.add_argument("--rate", type=float, default=0.0, help="maximum API calls per second (0 = unlimited)")
+    parser.add_argument("--validate", action="store_true",
+                        help="dry-run validation of generated commands (nothing is executed)")
+    parser.add_argument("--daemon", action="store_true",
+                        help="keep the assistant warm and serve chat_client.py over a Unix socket")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
+    args = parse_args()
+    if args.batch:
+        from ai_command_line import AICommandLine
+        from batch_runner import run_batch
+        console = Console(stderr=True)
+        succeeded, failed = run_batch(
+            AICommandLine(console),
+            args.batch,
+            args.output,
+            concurrency=args.concurrency,
+            rate_limit=args.rate,
+            validate=args.validate
+        )
+        console.print(f"[green]✅ {succeeded} succeeded[/green], [red]❌ {failed} failed[/red]")
+        sys.exit(1 if failed else 0)
+
+    if args.daemon:
+        from ai_command_line import AICommandLine
+        from daemon import CommandDaemon
+        console = Console(stderr=True)
+        command_daemon = CommandDaemon(AICommandLine(console))
+        console.print(f"[green]🚀 Listening on {command_daemon.path}[/green]")
+        command_daemon.serve_forever()
+        sys.exit(0)
+
     console = Console()
     console.print(Panel.fit(
         "✨ [bold green]AI Command Assistant[/bold green] ✨\n" +
         "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n" +
         "🤖 Ask commands in natural language\n" +
         "💡 Use 'ask <question>' format\n" +
+        "📊 Type '/stats' for timings of this session\n" +
+        "📄 Type '/output' to page or search the last long output\n" +
         "🚪 Type 'exit', 'quit', or 'q' to close\n\n" +
         "📍 Command Indicators:\n" +
         "   🟢 [green](>)[/green] Normal Command\n" +
@@ -31,5 +65,7 @@ if __name__ == "__main__":
         border_style="green"
     ))
 
+    from ai_command_line import AICommandLine
+
     cli = AICommandLine(console)
     cli.run()
\ No newline at end of file
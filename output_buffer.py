@@ -0,0 +1,122 @@
+import atexit
+import os
+import tempfile
+import threading
+from collections import deque
+from typing import Deque, Iterable, List, Optional, Set
+
+# Spill files still on disk; whatever the session has not removed goes at exit
+_spill_paths: Set[str] = set()
+_spill_lock = threading.Lock()
+
+
+def remove_spill_files(paths: Optional[Iterable[str]] = None):
+    """Delete the given spill files, or every one this process created, if still on disk"""
+    with _spill_lock:
+        targets = set(_spill_paths) if paths is None else _spill_paths.intersection(paths)
+        _spill_paths.difference_update(targets)
+    for path in targets:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+atexit.register(remove_spill_files)
+
+
+class OutputBuffer:
+    """Keep the head and tail lines of a stream within a fixed memory bound
+
+    Lines between the head and the tail are only counted. With `spill`
+    enabled the complete stream is also written to a temporary file; with
+    `spill_on_overflow` that only happens once lines start being dropped.
+    """
+
+    def __init__(self, head_lines: int = 100, tail_lines: int = 100, max_line_length: int = 4096,
+                 spill: bool = False, name: str = "output", spill_on_overflow: bool = False):
+        self.head_lines = head_lines
+        self.max_line_length = max_line_length
+        self.head: List[str] = []
+        self.tail: Deque[str] = deque(maxlen=tail_lines)
+        self.total_lines = 0
+        self.total_chars = 0
+        self.spill = spill
+        self.spill_path: Optional[str] = None
+        self._name = name
+        self._partial = ""
+        self._spill_file = None
+        self.spill_on_overflow = spill_on_overflow and not spill
+        # Raw text seen before the overflow, at most about head_lines + tail_lines long lines
+        self._held: List[str] = []
+
+    def write(self, text: str) -> List[str]:
+        """Add decoded text and return the complete lines it produced"""
+        if not text:
+            return []
+        self.total_chars += len(text)
+        if self.spill:
+            self._spill(text)
+        elif self.spill_on_overflow:
+            self._held.append(text)
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        # Never let a single unterminated line grow without bound
+        if len(self._partial) > self.max_line_length * 16:
+            lines.append(self._partial)
+            self._partial = ""
+        for line in lines:
+            self._add_line(line)
+        if self.spill_on_overflow and self.total_lines > self.head_lines + self.tail.maxlen:
+            self.spill_on_overflow = False
+            self.spill = True
+            self._spill("".join(self._held))
+            self._held = []
+        return lines
+
+    def _spill(self, text: str):
+        if self._spill_file is None:
+            # Created on first write so silent streams leave no empty files behind
+            self._spill_file = tempfile.NamedTemporaryFile(
+                "w", prefix=f"chat-cli-{self._name}-", suffix=".log", delete=False, encoding="utf-8"
+            )
+            self.spill_path = self._spill_file.name
+            with _spill_lock:
+                _spill_paths.add(self.spill_path)
+        self._spill_file.write(text)
+
+    def flush(self) -> List[str]:
+        """Finish the stream, returning the trailing unterminated line if any"""
+        lines = []
+        if self._partial:
+            lines.append(self._partial)
+            self._add_line(self._partial)
+            self._partial = ""
+        self._held = []
+        self.spill_on_overflow = False
+        if self._spill_file:
+            self._spill_file.close()
+            self._spill_file = None
+            self.spill = False
+        return lines
+
+    def _add_line(self, line: str):
+        line = line.rstrip("\r")
+        if len(line) > self.max_line_length:
+            line = line[:self.max_line_length] + " …"
+        self.total_lines += 1
+        if len(self.head) < self.head_lines:
+            self.head.append(line)
+        else:
+            self.tail.append(line)
+
+    @property
+    def omitted_lines(self) -> int:
+        return self.total_lines - len(self.head) - len(self.tail)
+
+    def text(self) -> str:
+        lines = list(self.head)
+        if self.omitted_lines:
+            lines.append(f"... [{self.omitted_lines} lines omitted] ...")
+        lines.extend(self.tail)
+        return "\n".join(lines)
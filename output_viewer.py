@@ -0,0 +1,150 @@
+import os
+import re
+import shlex
+import subprocess
+from array import array
+from typing import List, Optional, Tuple
+
+from rich.console import Console
+from rich.markup import escape
+from rich.text import Text
+
+# Longer lines are cut when drawn, so one page costs the same however wide the output is
+_MAX_LINE_LENGTH = 4096
+
+
+class OutputViewer:
+    """Page through and search a saved command output without rendering all of it
+
+    Line offsets are indexed once per file, so any page is a seek and a
+    short read. A search scans the file but draws only the matching lines.
+    """
+
+    def __init__(self, console: Console, path: str, page_lines: Optional[int] = None):
+        self.console = console
+        self.path = path
+        self.page_lines = page_lines or int(os.getenv('CHAT_CLI_PAGE_LINES', '40'))
+        self._offsets: Optional[array] = None
+
+    def _index(self) -> array:
+        if self._offsets is None:
+            offsets = array("Q", [0])
+            position = 0
+            with open(self.path, "rb") as f:
+                for line in f:
+                    position += len(line)
+                    offsets.append(position)
+            if len(offsets) > 1:
+                offsets.pop()  # The end of the last line is not the start of another one
+            self._offsets = offsets
+        return self._offsets
+
+    @property
+    def line_count(self) -> int:
+        offsets = self._index()
+        return len(offsets) if os.path.getsize(self.path) else 0
+
+    def lines(self, start: int, count: int) -> List[str]:
+        """Lines start..start+count (0-based), read straight from the file"""
+        offsets = self._index()
+        start = max(0, min(start, self.line_count))
+        result = []
+        with open(self.path, "rb") as f:
+            f.seek(offsets[start] if start < len(offsets) else 0)
+            for _ in range(min(count, self.line_count - start)):
+                result.append(f.readline().decode("utf-8", errors="replace").rstrip("\r\n"))
+        return result
+
+    def _print_line(self, number: int, line: str, highlight: Optional[re.Pattern] = None):
+        if len(line) > _MAX_LINE_LENGTH:
+            line = line[:_MAX_LINE_LENGTH] + " …"
+        text = Text(f"{number:>7} ", style="dim")
+        body = Text(line)
+        if highlight is not None:
+            body.highlight_regex(highlight, style="bold reverse")
+        text.append(body)
+        self.console.print(text, soft_wrap=True)
+
+    def show_page(self, start: int) -> int:
+        """Draw one page starting at line `start`; returns the start actually shown"""
+        start = max(0, min(start, max(0, self.line_count - self.page_lines)))
+        for offset, line in enumerate(self.lines(start, self.page_lines)):
+            self._print_line(start + offset + 1, line)
+        self.console.print(f"[dim]── lines {start + 1}-{min(start + self.page_lines, self.line_count)} "
+                           f"of {self.line_count} ──[/dim]")
+        return start
+
+    @staticmethod
+    def _compile(pattern: str) -> re.Pattern:
+        try:
+            return re.compile(pattern, re.IGNORECASE)
+        except re.error:
+            return re.compile(re.escape(pattern), re.IGNORECASE)
+
+    def search(self, pattern: str, start: int = 0, limit: int = 50) -> List[Tuple[int, str]]:
+        """Up to `limit` (line number, line) matches at or after line `start` (0-based)"""
+        regex = self._compile(pattern)
+        matches = []
+        with open(self.path, "r", encoding="utf-8", errors="replace") as f:
+            for number, line in enumerate(f):
+                if number < start or not regex.search(line):
+                    continue
+                matches.append((number, line.rstrip("\r\n")))
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    def show_search(self, pattern: str, start: int = 0, limit: int = 50) -> Optional[int]:
+        """Draw the matches of one search; returns the last matching line to continue from"""
+        matches = self.search(pattern, start, limit)
+        if not matches:
+            self.console.print(f"[yellow]No match for '{escape(pattern)}'[/yellow]")
+            return None
+        regex = self._compile(pattern)
+        for number, line in matches:
+            self._print_line(number + 1, line, regex)
+        more = " (/ again for more)" if len(matches) >= limit else ""
+        self.console.print(f"[dim]── {len(matches)} matches{more} ──[/dim]")
+        return matches[-1][0]
+
+    def open_pager(self):
+        """Hand the whole file to $PAGER (less by default)"""
+        pager = shlex.split(os.getenv('PAGER', 'less'))
+        try:
+            subprocess.run(pager + [self.path])
+        except OSError as e:
+            self.console.print(f"[red]❌ Could not start pager {pager[0]}: {e}[/red]")
+
+    def browse(self):
+        """Interactive loop: Enter/n next page, p previous, g <line> jump, /text search, l pager, q quit"""
+        from rich.prompt import Prompt
+
+        position = self.show_page(0)
+        last_search: Optional[Tuple[str, int]] = None
+        while True:
+            action = Prompt.ask("[dim](n)ext (p)rev (g N) go  /text search  (l)ess  (q)uit[/dim]",
+                                default="n", show_default=False, console=self.console).strip()
+            if action in ("q", "quit"):
+                break
+            if action in ("n", ""):
+                position = self.show_page(position + self.page_lines)
+            elif action == "p":
+                position = self.show_page(position - self.page_lines)
+            elif action.startswith("g"):
+                try:
+                    position = self.show_page(int(action[1:].strip()) - 1)
+                except ValueError:
+                    self.console.print("[red]Usage: g <line number>[/red]")
+            elif action.startswith("/"):
+                pattern = action[1:]
+                if not pattern and last_search:
+                    pattern, start = last_search[0], last_search[1] + 1
+                else:
+                    start = 0
+                if pattern:
+                    last = self.show_search(pattern, start)
+                    last_search = (pattern, last) if last is not None else None
+            elif action == "l":
+                self.open_pager()
+            else:
+                self.console.print("[red]Unknown action[/red]")
@@ -0,0 +1,130 @@
+import os
+import signal
+import subprocess
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+TIMEOUT = "timeout"
+OUTPUT = "output"
+CPU = "cpu"
+MEMORY = "memory"
+
+# Messages a process prints when an allocation fails under RLIMIT_AS
+_ALLOCATION_ERRORS = ("cannot allocate memory", "out of memory", "memoryerror", "bad_alloc", "std::bad_alloc")
+
+
+class LimitExceeded(Exception):
+    """Raised while streaming output once a command crosses its time or output limit"""
+
+    def __init__(self, limit: str):
+        super().__init__(limit)
+        self.limit = limit
+
+
+def _env_number(name: str, default: str) -> float:
+    return float(os.getenv(name, default) or 0)
+
+
+@dataclass
+class ResourceLimits:
+    """Limits for each command the executor starts; zero turns a limit off
+
+    Time and output are enforced by the executor while it streams output;
+    CPU time, address space and niceness are set by a `ulimit`/`nice`
+    prefix in front of the command (see wrap()).
+    """
+
+    timeout: float = 0.0
+    max_output_bytes: int = 0
+    cpu_seconds: int = 0
+    memory_bytes: int = 0
+    nice: int = 0
+    kill_grace: float = 2.0
+
+    @classmethod
+    def from_env(cls) -> "ResourceLimits":
+        return cls(
+            timeout=_env_number('CHAT_CLI_CMD_TIMEOUT', '0'),
+            max_output_bytes=int(_env_number('CHAT_CLI_CMD_MAX_OUTPUT_MB', '256') * 1024 * 1024),
+            cpu_seconds=int(_env_number('CHAT_CLI_CMD_CPU_SECONDS', '0')),
+            memory_bytes=int(_env_number('CHAT_CLI_CMD_MEMORY_MB', '0') * 1024 * 1024),
+            nice=int(_env_number('CHAT_CLI_CMD_NICE', '0')),
+        )
+
+    def deadline(self) -> Optional[float]:
+        """time.monotonic() value the command must finish by"""
+        return time.monotonic() + self.timeout if self.timeout else None
+
+    def wrap(self, args: List[str]) -> List[str]:
+        """args started under the CPU, address-space and niceness limits
+
+        The limits are set by a /bin/sh prefix that then execs the command:
+        nothing runs between fork and exec (preexec_fn is not safe once
+        threads exist), and the command cannot fork anything before the
+        limits are in place. If a limit cannot be set, the command does not run.
+        """
+        if os.name == "nt" or not (self.cpu_seconds or self.memory_bytes or self.nice):
+            return args
+        steps = []
+        if self.cpu_seconds:
+            # SIGXCPU at the soft limit, SIGKILL a second later if it is ignored; soft first, it must stay <= hard
+            steps += [f"ulimit -S -t {self.cpu_seconds}", f"ulimit -H -t {self.cpu_seconds + 1}"]
+        if self.memory_bytes:
+            steps.append(f"ulimit -v {max(1, self.memory_bytes // 1024)}")
+        steps.append(f'exec nice -n {self.nice} "$@"' if self.nice else 'exec "$@"')
+        return ["/bin/sh", "-c", " && ".join(steps), "sh"] + list(args)
+
+    def classify(self, returncode: Optional[int], stderr: str) -> Optional[str]:
+        """Name of the rlimit that ended a command, judged from how it exited"""
+        if returncode is None or os.name == "nt":
+            return None
+        if self.cpu_seconds and returncode in (-signal.SIGXCPU, 128 + signal.SIGXCPU):
+            return CPU
+        if self.memory_bytes and returncode != 0 and any(error in stderr.lower() for error in _ALLOCATION_ERRORS):
+            return MEMORY
+        return None
+
+    def describe(self, limit: str) -> str:
+        if limit == TIMEOUT:
+            return f"stopped after the {self.timeout:g}s time limit"
+        if limit == OUTPUT:
+            return f"stopped after {self.max_output_bytes // (1024 * 1024)} MB of output"
+        if limit == CPU:
+            return f"killed after {self.cpu_seconds}s of CPU time"
+        if limit == MEMORY:
+            return f"ran out of its {self.memory_bytes // (1024 * 1024)} MB address-space limit"
+        return limit
+
+
+def _signal_group(process: subprocess.Popen, sig: int):
+    try:
+        os.killpg(process.pid, sig)
+    except ProcessLookupError:
+        pass
+    except PermissionError:
+        # Nothing in the group could be signalled, e.g. only sudo's root child is left; try the leader
+        try:
+            os.kill(process.pid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+def kill_process_group(process: subprocess.Popen, grace: float = 2.0):
+    """Stop a child started in its own session together with everything it spawned
+
+    SIGTERM first so sudo and well-behaved programs can pass it on and
+    clean up, then SIGKILL for whatever is left after `grace` seconds.
+    """
+    if os.name == "nt":
+        process.kill()
+        process.wait()
+        return
+    _signal_group(process, signal.SIGTERM)
+    try:
+        process.wait(timeout=grace)
+    except subprocess.TimeoutExpired:
+        pass
+    # Pipeline members that outlived the leader are still in its group
+    _signal_group(process, signal.SIGKILL)
+    process.wait()
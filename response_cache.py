@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from cache_paths import cache_dir
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split()).casefold()
+
+
+def make_cache_key(query: str, sys_info: str, model: str, temperature: float, master_prompt: str) -> str:
+    """Build the cache key from everything that influences the generated commands"""
+    prompt_hash = hashlib.sha256(master_prompt.encode()).hexdigest()
+    material = json.dumps(
+        [normalize_query(query), sys_info, model, temperature, prompt_hash],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+class ResponseCache:
+    """Persistent LRU + TTL cache of parsed API responses, shared between CLI processes"""
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None,
+                 ttl: Optional[float] = None):
+        self.path = path or os.path.join(cache_dir(), "responses.sqlite3")
+        self.max_entries = max_entries or int(os.getenv('CHAT_CLI_CACHE_MAX_ENTRIES', '1000'))
+        self.ttl = ttl if ttl is not None else float(os.getenv('CHAT_CLI_CACHE_TTL', str(7 * 24 * 3600)))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # sqlite handles locking between processes; WAL keeps readers from blocking the writer
+        self._conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed_at)")
+
+    def get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, value: dict):
+        now = time.time()
+        # One connection is shared by the threads of a process; sqlite locks between processes
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float):
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+        self._conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            " SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": entries,
+        }
+
+    def close(self):
+        self._conn.close()
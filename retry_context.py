@@ -0,0 +1,154 @@
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+# Rough size of one token; measuring in UTF-8 bytes keeps non-ASCII output from being undercounted
+_BYTES_PER_TOKEN = 4
+_MAX_LINE_CHARS = 400
+# Matched against lowercased text; a case-insensitive alternation is several times slower
+_ERROR_LINE = re.compile(
+    r"error|fail|fatal|denied|not found|no such|cannot|can't|unable|invalid|exception|traceback|refused|timed? ?out"
+)
+
+
+@dataclass
+class RetryContext:
+    query: str
+    size: int            # Bytes sent
+    trimmed_bytes: int   # Bytes left out compared to pasting everything
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.query)
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text.encode("utf-8")) + _BYTES_PER_TOKEN - 1) // _BYTES_PER_TOKEN
+
+
+def _size(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def _clip_line(line: str) -> str:
+    if len(line) <= _MAX_LINE_CHARS:
+        return line
+    return line[:_MAX_LINE_CHARS] + f" ... [{len(line) - _MAX_LINE_CHARS} chars omitted]"
+
+
+def excerpt_output(output: str, budget: int) -> str:
+    """Fit output into `budget` bytes: error lines first, then the head and the tail
+
+    Selected lines stay in their original order; gaps are marked with the
+    number of lines left out.
+    """
+    if _size(output) <= budget:
+        return output
+    lines = output.split("\n")
+    chosen: Dict[int, str] = {}
+    used = 0
+
+    def take(index: int, limit: int) -> bool:
+        nonlocal used
+        if index in chosen:
+            return True
+        line = _clip_line(lines[index])
+        size = _size(line) + 1
+        if used + size > limit:
+            return False
+        chosen[index] = line
+        used += size
+        return True
+
+    # Leave room for the omission markers between the selected runs
+    budget = max(0, budget - 64)
+    # Error lines are found with one regex scan of the text, not line by line
+    lowered = output.lower()
+    line_index, scanned = 0, 0
+    for match in _ERROR_LINE.finditer(lowered):
+        line_index += lowered.count("\n", scanned, match.start())
+        scanned = match.start()
+        if not take(line_index, budget // 2):
+            break
+    head_limit = used + (budget - used) // 2
+    for i in range(len(lines)):
+        if not take(i, head_limit):
+            break
+    for i in reversed(range(len(lines))):
+        if not take(i, budget):
+            break
+
+    rendered: List[str] = []
+    previous = -1
+    for i in sorted(chosen):
+        if i > previous + 1:
+            rendered.append(f"... [{i - previous - 1} lines omitted] ...")
+        rendered.append(chosen[i])
+        previous = i
+    if previous < len(lines) - 1:
+        rendered.append(f"... [{len(lines) - previous - 1} lines omitted] ...")
+    return "\n".join(rendered)
+
+
+def dedupe_commands(commands: List[str]) -> List[str]:
+    """Unique commands, most recent attempt last"""
+    seen: Set[str] = set()
+    unique: List[str] = []
+    for command in reversed(commands):
+        key = " ".join(command.split())
+        if key not in seen:
+            seen.add(key)
+            unique.append(command)
+    unique.reverse()
+    return unique
+
+
+class RetryContextBuilder:
+    """Build the FIX/REVISE query for a retry within a token budget"""
+
+    def __init__(self, token_budget: Optional[int] = None):
+        self.token_budget = token_budget if token_budget is not None \
+            else int(os.getenv('CHAT_CLI_RETRY_TOKENS', '2000'))
+
+    @staticmethod
+    def _render(goal: str, last_command: str, return_code: int, output: str, tried: str) -> str:
+        return f"\n\n[Goal]\n{goal}\n\n[FIX or REVISE]\ncommand:\n`{last_command}`\n" \
+            + f"ReturnCode: {return_code}\n다음 출력을 참고하시오:\n```{output}```\n\n" \
+            + f"다음 커맨드는 이미 시도해 보았습니다.:\n{tried}"
+
+    def build(self, goal: str, command_stack: List[str], last_output: str, return_code: int = 0) -> RetryContext:
+        last_command = command_stack[-1] if command_stack else ""
+        full_size = _size(self._render(
+            goal, last_command, return_code, last_output, "\n".join(f"`{c}`" for c in command_stack)))
+
+        budget = self.token_budget * _BYTES_PER_TOKEN
+        remaining = budget - _size(self._render(goal, last_command, return_code, "", ""))
+
+        # Earlier attempts get at most a quarter of what is left, newest first
+        attempts = dedupe_commands(command_stack)
+        tried: List[str] = []
+        history_budget = max(0, remaining // 4)
+        used = 0
+        for command in reversed(attempts):
+            line = f"`{_clip_line(command)}`"
+            if used + _size(line) + 1 > history_budget:
+                break
+            tried.append(line)
+            used += _size(line) + 1
+        tried.reverse()
+        if len(tried) < len(attempts):
+            tried.insert(0, f"... [{len(attempts) - len(tried)} earlier commands omitted]")
+        tried_text = "\n".join(tried)
+
+        output = excerpt_output(last_output, max(0, remaining - _size(tried_text)))
+        query = self._render(goal, last_command, return_code, output, tried_text)
+        size = _size(query)
+        return RetryContext(query=query, size=size, trimmed_bytes=max(0, full_size - size))
+
+    def alternative(self, goal: str, commands: List[str]) -> RetryContext:
+        """Ask for a different approach to the same goal than the commands just shown"""
+        shown = [f"`{_clip_line(command)}`" for command in dedupe_commands(commands)]
+        query = f"\n\n[Goal]\n{goal}\n\n[ALTERNATIVE]\n다음 커맨드와는 다른 방법으로 같은 목표를 달성하는 명령어를 제시하시오.:\n" \
+            + "\n".join(shown)
+        return RetryContext(query=query, size=_size(query), trimmed_bytes=0)
@@ -0,0 +1,139 @@
+import os
+import selectors
+import shlex
+import shutil
+import signal
+import subprocess
+import time
+import uuid
+from typing import Dict, Iterator, Optional, Tuple
+
+from resource_governor import TIMEOUT, LimitExceeded, ResourceLimits
+
+
+class ShellSession:
+    """Long-lived shell that runs commands back to back, keeping cwd and env between them
+
+    Each command is written to the shell's stdin followed by sentinel
+    markers on stdout and stderr; the stdout marker also carries the exit
+    code, which frames the command's output without spawning a process.
+    """
+
+    def __init__(self, shell: Optional[str] = None, chunk_size: int = 65536,
+                 limits: Optional[ResourceLimits] = None):
+        self.shell = shell or shutil.which("bash") or "/bin/sh"
+        self.chunk_size = chunk_size
+        # Rlimits and niceness set on the shell are inherited by every command it runs
+        self.limits = limits
+        self.process: Optional[subprocess.Popen] = None
+        self.returncode: Optional[int] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        args = [self.shell]
+        if os.path.basename(self.shell) == "bash":
+            args += ["--noprofile", "--norc"]
+        self.process = subprocess.Popen(
+            self.limits.wrap(args) if self.limits else args,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True
+        )
+
+    def stream(self, command: str, deadline: Optional[float] = None) -> Iterator[Tuple[str, bytes]]:
+        """Run command in the shell, yielding (stream name, data) until it finishes
+
+        Raises LimitExceeded once `deadline` (time.monotonic()) passes; the
+        caller is expected to kill() the session then.
+        """
+        if not self.alive:
+            self.start()
+        self.returncode = None
+        token = f"__CHAT_CLI_{uuid.uuid4().hex}__"
+        # eval keeps syntax errors from killing the shell; /dev/null keeps the command off our pipe
+        script = (
+            f"eval {shlex.quote(command)} < /dev/null\n"
+            f"printf '%s%d\\n' '{token}' $?\n"
+            f"printf '%s\\n' '{token}' >&2\n"
+        )
+        self.process.stdin.write(script.encode())
+        self.process.stdin.flush()
+
+        marker = token.encode()
+        names = {self.process.stdout.fileno(): "stdout", self.process.stderr.fileno(): "stderr"}
+        pending: Dict[str, bytes] = {"stdout": b"", "stderr": b""}
+        with selectors.DefaultSelector() as selector:
+            for fd in names:
+                selector.register(fd, selectors.EVENT_READ)
+            while selector.get_map():
+                if deadline is not None and deadline <= time.monotonic():
+                    raise LimitExceeded(TIMEOUT)
+                events = selector.select(None if deadline is None else deadline - time.monotonic())
+                for key, _ in events:
+                    name = names[key.fd]
+                    data = os.read(key.fd, self.chunk_size)
+                    if not data:
+                        # The command exited the shell itself
+                        selector.unregister(key.fd)
+                        if pending[name]:
+                            yield name, pending[name]
+                            pending[name] = b""
+                        continue
+
+                    buffer = pending[name] + data
+                    index = buffer.find(marker)
+                    if index < 0:
+                        # Hold back a possible partial marker at the end of the chunk
+                        cut = max(len(buffer) - len(marker) + 1, 0)
+                        pending[name] = buffer[cut:]
+                        if cut:
+                            yield name, buffer[:cut]
+                        continue
+
+                    if index:
+                        yield name, buffer[:index]
+                    rest = buffer[index + len(marker):]
+                    if b"\n" not in rest:
+                        pending[name] = buffer[index:]
+                        continue
+                    pending[name] = b""
+                    selector.unregister(key.fd)
+                    if name == "stdout":
+                        self.returncode = int(rest.split(b"\n", 1)[0] or 0)
+
+        if self.returncode is None:
+            self.returncode = self.process.wait()
+
+    def kill(self):
+        """Kill the shell and everything it started"""
+        if self.alive:
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        if self.process is not None:
+            self.returncode = self.process.wait()
+        self._reap()
+
+    def close(self):
+        if self.alive:
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=1)
+            except (OSError, subprocess.TimeoutExpired):
+                self.kill()
+        self._reap()
+
+    def _reap(self):
+        if self.process is not None:
+            self.process.wait()
+            for stream in (self.process.stdin, self.process.stdout, self.process.stderr):
+                try:
+                    stream.close()
+                except OSError:
+                    pass
+            self.process = None
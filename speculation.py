@@ -0,0 +1,96 @@
+import os
+import threading
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class SpeculativePrefetcher(Generic[T]):
+    """Fetch likely next responses in the background, keyed by the exact query that would be sent
+
+    prefetch() starts a request while the user is still reading or a
+    command is still running; take() hands over its result if the user
+    then asks for that same query. Everything not taken is dropped by
+    cancel(): requests not started yet never go out, and finished or
+    in-flight ones count as wasted. At most `budget` speculative requests
+    are sent per session.
+    """
+
+    def __init__(self, fetch: Callable[[str], T], enabled: Optional[bool] = None,
+                 budget: Optional[int] = None, max_in_flight: int = 2):
+        if enabled is None:
+            enabled = os.getenv('CHAT_CLI_SPECULATE', '').lower() in ('1', 'true', 'yes')
+        self.enabled = enabled
+        self.budget = budget if budget is not None else int(os.getenv('CHAT_CLI_SPECULATE_BUDGET', '20'))
+        self.max_in_flight = max_in_flight
+        self.spent = 0
+        self.counters: Counter = Counter()
+        self._fetch = fetch
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def prefetch(self, key: str) -> bool:
+        """Start fetching `key` unless it is pending already or the budget is spent"""
+        if not self.enabled:
+            return False
+        with self._lock:
+            if key in self._pending:
+                return True
+            if self.spent >= self.budget:
+                self.counters["over_budget"] += 1
+                return False
+            if len(self._pending) >= self.max_in_flight:
+                self.counters["skipped"] += 1
+                return False
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="speculate")
+            self._pending[key] = self._pool.submit(self._fetch, key)
+            self.spent += 1
+            self.counters["started"] += 1
+            return True
+
+    def ready(self, key: str) -> bool:
+        with self._lock:
+            future = self._pending.get(key)
+        return future is not None and future.done()
+
+    def take(self, key: str) -> Optional[T]:
+        """The prefetched result for `key`, waiting for it if still in flight; None if there is none"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            future = self._pending.pop(key, None)
+        if future is None:
+            self.counters["missed"] += 1
+            return None
+        if not future.done():
+            self.counters["waited"] += 1
+        try:
+            result = future.result()
+        except Exception:
+            self.counters["failed"] += 1
+            return None
+        self.counters["used"] += 1
+        return result
+
+    def cancel(self):
+        """Drop every prefetch that was not taken"""
+        with self._lock:
+            for future in self._pending.values():
+                if future.cancel():
+                    self.spent -= 1  # Never sent, so it does not count against the budget
+                    self.counters["cancelled"] += 1
+                else:
+                    self.counters["wasted"] += 1
+            self._pending = {}
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.counters, budget_left=max(0, self.budget - self.spent))
+
+    def close(self):
+        self.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,191 @@
+import codecs
+import itertools
+import json
+import re
+from typing import Any, Dict, Iterator, List, Optional
+
+_LINE_BREAK_RE = re.compile(r"\r\n|\r|\n")
+
+
+class IncrementalCommandParser:
+    """Incrementally parse the command JSON object as it streams in
+
+    Each entry of the "commands" array is reported as soon as its string
+    literal is closed, and every other top-level field becomes available in
+    `fields` once its value is complete.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.commands: List[str] = []
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[str]:
+        """Consume a chunk of response text and return the commands it completed"""
+        completed = []
+        start = len(self.text)
+        self.text += chunk
+        text = self.text
+        for i in range(start, len(text)):
+            if self.done:
+                break
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._end_string(i, completed)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+                if self._depth == 1 and self._key is not None and self._value_start is None:
+                    self._value_start = i
+            elif ch in '{[':
+                if self._depth == 0:
+                    if ch == '{':
+                        self._depth = 1
+                    continue
+                if self._depth == 1 and self._key is not None and self._value_start is None:
+                    self._value_start = i
+                self._depth += 1
+            elif ch in '}]':
+                if self._depth == 0:
+                    continue
+                if self._depth == 1:
+                    self._end_scalar(i)
+                    self.done = True
+                self._depth -= 1
+                if self._depth == 1 and self._value_start is not None:
+                    self._set_field(text[self._value_start:i + 1])
+            elif self._depth == 1:
+                if ch == ',':
+                    self._end_scalar(i)
+                    self._key = None
+                elif ch not in ': \t\r\n' and self._key is not None and self._value_start is None:
+                    self._value_start = i
+        return completed
+
+    def _end_string(self, end: int, completed: List[str]):
+        raw = self.text[self._string_start:end + 1]
+        if self._depth == 1:
+            if self._key is None:
+                self._key = json.loads(raw)
+            elif self._value_start == self._string_start:
+                self._set_field(raw)
+        elif (self._depth == 2 and self._key == "commands"
+              and self._value_start is not None and self.text[self._value_start] == '['):
+            command = json.loads(raw)
+            self.commands.append(command)
+            completed.append(command)
+
+    def _end_scalar(self, end: int):
+        if self._value_start is not None:
+            self._set_field(self.text[self._value_start:end].strip())
+
+    def _set_field(self, raw: str):
+        try:
+            self.fields[self._key] = json.loads(raw)
+        except ValueError:
+            pass  # Leave malformed values for the final parse to report
+        self._value_start = None
+
+    def result(self) -> dict:
+        """Return the fully parsed object once the stream has finished"""
+        if not self.done:
+            raise ValueError("Incomplete JSON response from stream")
+        return self.fields
+
+
+def _charset(content_type: str) -> str:
+    for parameter in content_type.split(";")[1:]:
+        name, _, value = parameter.strip().partition("=")
+        if name.lower() == "charset" and value:
+            return value.strip('"\'')
+    return "utf-8"  # SSE is UTF-8 by definition, and so is JSON without a declared charset
+
+
+def _iter_decoded(response, content_type: str) -> Iterator[str]:
+    """Decode the raw body incrementally, so a character split between chunks comes out whole"""
+    try:
+        decoder = codecs.getincrementaldecoder(_charset(content_type))(errors="replace")
+    except LookupError:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    for chunk in response.iter_content(chunk_size=None):
+        text = decoder.decode(chunk) if chunk else ""
+        if text:
+            yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+
+def _iter_lines(chunks: Iterator[str]) -> Iterator[str]:
+    """Complete lines of a chunked text stream, ended by CRLF, LF or CR"""
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        # A trailing CR may be the first half of a CRLF split across chunks
+        held = buffer.endswith("\r")
+        lines = _LINE_BREAK_RE.split(buffer[:-1] if held else buffer)
+        buffer = lines.pop() + ("\r" if held else "")
+        yield from lines
+    if buffer:
+        yield from _LINE_BREAK_RE.split(buffer.rstrip("\r"))
+
+
+def _event_text(data: str) -> str:
+    # Only a wrapper object is unwrapped; raw deltas such as '"ls -la"' or '1' are JSON too but are text
+    if not data.startswith("{"):
+        return data
+    try:
+        event = json.loads(data)
+    except ValueError:
+        return data
+    if isinstance(event, dict):
+        for field in ("delta", "text", "data"):
+            if isinstance(event.get(field), str):
+                return event[field]
+    return data
+
+
+def iter_stream_text(response) -> Iterator[str]:
+    """Yield response text deltas from a streaming API response
+
+    Server-sent events carry either raw text or a JSON object with a
+    "delta", "text" or "data" string; any other event data is raw text, and
+    any other body is passed through as plain chunked text. The body is read as bytes and decoded here, since
+    requests falls back to ISO-8859-1 for text/* without a charset.
+    """
+    content_type = response.headers.get("Content-Type", "")
+    chunks = _iter_decoded(response, content_type)
+    if "text/event-stream" not in content_type:
+        yield from chunks
+        return
+
+    data: List[str] = []
+    # The end of the stream also ends an event that is missing its blank line
+    for line in itertools.chain(_iter_lines(chunks), [""]):
+        if line.startswith("data:"):
+            data.append(line[6:] if line[5:6] == " " else line[5:])
+            continue
+        if line or not data:
+            continue  # Other fields and comments, or a blank line with no event pending
+        # A blank line ends the event; its data lines are joined with newlines
+        event, data = "\n".join(data), []
+        if event == "[DONE]":
+            return
+        text = _event_text(event)
+        if text:
+            yield text
@@ -0,0 +1,157 @@
+import json
+import os
+import platform
+import shutil
+import tempfile
+import threading
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+
+from cache_paths import cache_dir
+
+
+_OS_RELEASE = "/etc/os-release"
+_PACKAGE_MANAGERS = [
+    ("apt-get", "apt"), ("dnf", "dnf"), ("yum", "yum"), ("pacman", "pacman"), ("zypper", "zypper"),
+    ("apk", "apk"), ("brew", "brew"), ("port", "macports"), ("winget", "winget"), ("choco", "choco"),
+]
+
+
+@dataclass
+class SystemProfile:
+    os_system: str
+    os_name: str
+    os_release: str
+    os_version: str
+    machine: str
+    processor: str = ""
+    shell: Optional[str] = None
+    package_manager: Optional[str] = None
+    init_system: Optional[str] = None
+    cpu_count: Optional[int] = None
+
+    def summary(self) -> str:
+        """One-line description of the system for the prompt"""
+        facts = [f"{self.os_name} ({self.machine})"]
+        if self.shell:
+            facts.append(f"shell: {self.shell}")
+        if self.package_manager:
+            facts.append(f"package manager: {self.package_manager}")
+        if self.init_system:
+            facts.append(f"init: {self.init_system}")
+        if self.cpu_count:
+            facts.append(f"cores: {self.cpu_count}")
+        return ", ".join(facts)
+
+
+def _detect_init_system(os_system: str) -> Optional[str]:
+    if os_system == "darwin":
+        return "launchd"
+    if os_system != "linux":
+        return None
+    if os.path.isdir("/run/systemd/system"):
+        return "systemd"
+    try:
+        with open("/proc/1/comm") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def probe_system() -> SystemProfile:
+    """Probe the OS; slow parts (platform.processor may fork uname -p) run only here"""
+    os_system = platform.system().lower()
+    os_release = platform.release()
+
+    if os_system == "linux":
+        try:
+            with open(_OS_RELEASE) as f:
+                os_info = dict(line.strip().split('=', 1) for line in f if '=' in line)
+                os_name = os_info.get('PRETTY_NAME', '').strip('"')
+        except OSError:
+            os_name = f"Linux {os_release}"
+    elif os_system == "darwin":
+        os_name = f"macOS {platform.mac_ver()[0]}"
+    elif os_system == "windows":
+        os_name = f"Windows {platform.win32_ver()[0]}"
+    else:
+        os_name = f"{os_system} {os_release}"
+
+    shell = os.getenv("SHELL") or os.getenv("COMSPEC")
+    package_manager = next((name for binary, name in _PACKAGE_MANAGERS if shutil.which(binary)), None)
+    return SystemProfile(
+        os_system=os_system,
+        os_name=os_name or f"Linux {os_release}",
+        os_release=os_release,
+        os_version=platform.version(),
+        machine=platform.machine(),
+        processor=platform.processor(),
+        shell=os.path.basename(shell) if shell else None,
+        package_manager=package_manager,
+        init_system=_detect_init_system(os_system),
+        cpu_count=os.cpu_count(),
+    )
+
+
+def _fingerprint() -> Dict[str, object]:
+    """Cheap facts that change whenever a cached profile could be stale"""
+    try:
+        os_release_mtime = os.stat(_OS_RELEASE).st_mtime
+    except OSError:
+        os_release_mtime = None
+    release = os.uname().release if hasattr(os, "uname") else platform.release()
+    return {"release": release, "os_release_mtime": os_release_mtime, "shell": os.getenv("SHELL")}
+
+
+class SystemProfiler:
+    """Probe the system once in the background and keep the result in a small cache file"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(cache_dir(), "system_profile.json")
+        self._profile: Optional[SystemProfile] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Load the cached profile, or start probing in the background if it is stale"""
+        self._profile = self._load()
+        if self._profile is None:
+            self._thread = threading.Thread(target=self._probe, name="system-profile", daemon=True)
+            self._thread.start()
+
+    def get(self) -> SystemProfile:
+        if self._profile is None:
+            if self._thread is None:
+                self.start()
+            if self._thread is not None:
+                self._thread.join()
+            if self._profile is None:
+                self._profile = probe_system()  # Background probe failed; try in the foreground
+        return self._profile
+
+    def _probe(self):
+        try:
+            profile = probe_system()
+        except Exception:
+            return
+        self._profile = profile
+        self._save(profile)
+
+    def _load(self) -> Optional[SystemProfile]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("fingerprint") != _fingerprint():
+                return None
+            return SystemProfile(**cached["profile"])
+        except (OSError, ValueError, TypeError, KeyError):
+            return None
+
+    def _save(self, profile: SystemProfile):
+        data = {"fingerprint": _fingerprint(), "profile": asdict(profile)}
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass  # The cache is only an optimization
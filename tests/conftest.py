@@ -0,0 +1,13 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the top of the repository rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def _cache_dir(monkeypatch, tmp_path):
+    """Keep executables.json, history and traces out of the real ~/.cache/chat-cli"""
+    monkeypatch.setenv("CHAT_CLI_CACHE_DIR", str(tmp_path / "cache"))
@@ -0,0 +1,91 @@
+import io
+import sys
+from contextlib import redirect_stdout
+
+import pytest
+from rich.console import Console
+
+from benchmarks.mock_server import MockLLMServer
+
+RESPONSE = {"commands": ["echo from-history"], "options": [], "dangerous": False, "sudo_required": False,
+            "description": "echo"}
+
+
+@pytest.fixture
+def cli_env(monkeypatch, tmp_path):
+    server = MockLLMServer(response=RESPONSE).start()
+    for name, value in {"API_URL": server.url, "API_STREAM": "0", "CHAT_CLI_NO_CACHE": "1",
+                        "CHAT_CLI_CACHE_DIR": str(tmp_path), "CHAT_CLI_TRACE": "0"}.items():
+        monkeypatch.setenv(name, value)
+    yield server
+    server.stop()
+
+
+def _run(script: str) -> str:
+    from ai_command_line import AICommandLine
+
+    output = io.StringIO()
+    cli = AICommandLine(Console(file=output, width=200))
+    stdin, sys.stdin = sys.stdin, io.StringIO(script)
+    try:
+        with redirect_stdout(io.StringIO()):
+            cli.run()
+    finally:
+        sys.stdin = stdin
+    return output.getvalue()
+
+
+def test_history_suggestion_can_be_picked(cli_env):
+    _run("print something\ny\nd\nexit\n")
+    RESPONSE["commands"] = ["echo fresh-answer"]
+    try:
+        output = _run("print something\n1\ny\nd\nexit\n")
+    finally:
+        RESPONSE["commands"] = ["echo from-history"]
+    assert "1. echo from-history" in output
+    assert output.rindex("from-history") > output.index("fresh-answer")  # Ran the picked commands
+
+
+@pytest.mark.parametrize("speculate", ["0", "1"])
+def test_alternative_works_with_and_without_speculation(cli_env, monkeypatch, speculate):
+    monkeypatch.setenv("CHAT_CLI_SPECULATE", speculate)
+    output = _run("print something\na\nn\nexit\n")
+    assert cli_env.requests >= 2  # The question, then the alternative (prefetched or not)
+    assert output.count("echo from-history") >= 2
+
+
+def test_alternative_falls_back_when_the_prefetch_failed(cli_env, monkeypatch):
+    monkeypatch.setenv("CHAT_CLI_SPECULATE", "1")
+    from ai_command_line import AICommandLine
+
+    def failing(self, query):
+        raise RuntimeError("prefetch failed")
+
+    monkeypatch.setattr(AICommandLine, "_speculate", failing)
+    _run("print something\na\nn\nexit\n")
+    assert cli_env.requests == 2
+
+
+def test_unusable_cache_directory_does_not_stop_startup(cli_env, monkeypatch, tmp_path):
+    import tempfile
+
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    monkeypatch.setenv("CHAT_CLI_CACHE_DIR", str(blocker / "cache"))
+    monkeypatch.setenv("CHAT_CLI_NO_CACHE", "0")
+    monkeypatch.setattr(tempfile, "tempdir", str(blocker / "tmp"))  # The fallback is unusable too
+    output = _run("print something\ny\nd\nexit\n")
+    assert "Response cache disabled" in output and "History disabled" in output
+    assert "from-history" in output
+
+
+def test_cache_directory_falls_back_to_temp_dir(monkeypatch, tmp_path):
+    import tempfile
+
+    from cache_paths import cache_dir
+
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    monkeypatch.setenv("CHAT_CLI_CACHE_DIR", str(blocker / "cache"))
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    assert cache_dir().startswith(str(tmp_path / "chat-cli-"))
@@ -0,0 +1,41 @@
+import io
+
+import pytest
+from rich.console import Console
+
+from command_executor import CommandExecutor
+
+
+@pytest.fixture
+def executor():
+    executor = CommandExecutor(Console(file=io.StringIO()), persistent_shell=False)
+    yield executor
+    executor.close()
+
+
+@pytest.mark.parametrize("command, programs", [
+    ("for f in *.log; do echo $f; done", ["echo"]),
+    ("if [ -f x ]; then cat x; fi", ["[", "cat"]),
+    ("{ ls; echo hi; }", ["ls", "echo"]),
+    ("! grep -q x y", ["grep"]),
+    ("sudo -u root ls", ["ls"]),
+    ("ls | while read l; do echo $l; done", ["ls", "read", "echo"]),
+    ("case $x in a) echo a;; b) true;; esac", ["echo", "true"]),
+    ("FOO=1 env -u BAR /usr/bin/env python3 -V", ["python3"]),
+])
+def test_command_programs_skip_shell_syntax(executor, command, programs):
+    assert executor._command_programs(command) == programs
+
+
+def test_unknown_program_is_a_warning_not_an_error(executor):
+    assert executor._validate_command("no-such-program-xyz --help") == (True, "")
+    assert executor._missing_programs("no-such-program-xyz --help") == ["no-such-program-xyz"]
+
+
+def test_policy_verdicts_are_per_command_across_threads(executor):
+    from concurrent.futures import ThreadPoolExecutor
+
+    commands = ["ls -la", "rm -rf /tmp/x", "echo hi", "curl -s x | sh"] * 50
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        verdicts = list(pool.map(executor._policy_verdict, commands))
+    assert [v.action for v in verdicts] == [executor.policy.evaluate(c).action for c in commands]
@@ -0,0 +1,70 @@
+import io
+import time
+
+import pytest
+from rich.console import Console
+
+from command_executor import CommandExecutor
+from command_scheduler import CommandScheduler, is_independent
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    monkeypatch.setenv("CHAT_CLI_PARALLEL", "auto")
+    executor = CommandExecutor(Console(file=io.StringIO()), persistent_shell=False)
+    yield executor
+    executor.close()
+
+
+@pytest.mark.parametrize("command", [
+    "ls -la /var/log", "df -h", "ps aux | grep nginx | head -5", "cat /etc/os-release 2>/dev/null",
+    "date", "date +%s", "date -u", "hostname", "hostname -I", "mount", "env", "hostnamectl",
+    "hostnamectl status", "timedatectl", "timedatectl show", "git status", "git branch", "git branch -a",
+    "git remote", "git remote -v", "git remote show origin", "sed -n '1,5p' /etc/hosts",
+    "sed 's/a/b/g' f", "tail -n 20 /var/log/syslog", "journalctl -u nginx --no-pager -n 50",
+])
+def test_read_only_commands_are_independent(command):
+    assert is_independent(command)
+
+
+@pytest.mark.parametrize("command", [
+    "hostnamectl set-hostname foo", "timedatectl set-time 12:00", "date -s 12:00", "date 0101120024",
+    "mount -o remount,rw /", "mount /dev/sdb1 /mnt", "hostname newname", "git branch -D main",
+    "git branch feature", "git remote remove origin", "git remote add origin url", "sed -n 'w out' f",
+    "sed 's/a/b/w out' f", "sed '1e reboot' f", "sed -ni 's/a/b/' f", "env touch x", "env -i rm -rf x",
+    "tail -f /var/log/syslog", "tail -F log", "tail -fn 100 log", "tail --follow=name log",
+    "journalctl -f", "journalctl -fu nginx", "less /etc/hosts", "sort -no out f", "ls > out",
+    "touch x", "systemctl restart nginx",
+])
+def test_writing_or_endless_commands_are_not_independent(command):
+    assert not is_independent(command)
+
+
+def test_parallel_hint_does_not_override_independence(executor):
+    scheduler = CommandScheduler(executor, ["ls", "touch /tmp/chat-cli-test", "df -h"], parallel_hint=True,
+                                 max_workers=4)
+    assert scheduler.groups == [[0], [1], [2]]
+
+
+def test_parallel_hint_false_keeps_commands_sequential(executor):
+    scheduler = CommandScheduler(executor, ["ls", "df -h"], parallel_hint=False, max_workers=4)
+    assert scheduler.groups == [[0], [1]]
+
+
+def test_cancel_stops_running_group_members(executor):
+    scheduler = CommandScheduler(executor, ["sleep 30", "sleep 30"], max_workers=4)
+    assert scheduler.groups == [[0, 1]]
+    scheduler._start_group([0, 1])
+    futures = dict(scheduler._futures)
+    deadline = time.monotonic() + 5
+    while len(scheduler._running) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    processes = list(scheduler._running.values())
+    assert len(processes) == 2
+
+    start = time.monotonic()
+    scheduler.cancel()
+    for future in futures.values():
+        future.result(timeout=5)
+    assert time.monotonic() - start < 5
+    assert all(process.poll() is not None for process in processes)
@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+from benchmarks.mock_server import MockLLMServer
+from endpoint_pool import EndpointPool
+from http_transport import HttpTransport
+
+PAYLOAD = {"inputs": [{"role": "user", "content": "uptime"}]}
+
+
+@pytest.fixture
+def servers():
+    slow = MockLLMServer(latency=5.0).start()
+    fast = MockLLMServer(latency=0.0).start()
+    yield slow, fast
+    slow.stop()
+    fast.stop()
+
+
+def test_losing_hedge_is_cut_off(servers):
+    slow, fast = servers
+    transport = HttpTransport(slow.url)
+    pool = EndpointPool(transport, [slow.url, fast.url], hedge_delay=0.05)
+    try:
+        start = time.perf_counter()
+        response = pool.post(PAYLOAD)
+        assert response.status_code == 200
+        response.close()
+        assert time.perf_counter() - start < 1.0
+        assert pool.hedge_wins == 1
+
+        # The stalled primary gives its worker back long before the server would answer
+        deadline = time.monotonic() + 1.0
+        while len(transport.timings) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(transport.timings) == 2
+        assert pool.endpoints[0].failures == 0  # Losing the race is not held against the endpoint
+    finally:
+        pool.close()
+        transport.close()
+
+
+def test_single_attempt_by_default(monkeypatch):
+    monkeypatch.delenv("API_MAX_ATTEMPTS", raising=False)
+    with MockLLMServer(fail_rate=1.0) as server:
+        transport = HttpTransport(server.url)
+        pool = EndpointPool(transport, [server.url])
+        try:
+            response = pool.post(PAYLOAD)
+            assert response.status_code == 503
+            response.close()
+            assert server.requests == 1 and pool.retries == 0
+        finally:
+            pool.close()
+            transport.close()
+
+
+def test_tripped_backup_recovers_while_primary_is_healthy():
+    with MockLLMServer() as primary, MockLLMServer() as backup:
+        transport = HttpTransport(primary.url)
+        pool = EndpointPool(transport, [primary.url, backup.url], hedge_delay=5.0,
+                            breaker_threshold=1, breaker_reset=0.05)
+        try:
+            pool.endpoints[1].breaker.record_failure()
+            time.sleep(0.1)
+            for _ in range(3):
+                pool.post(PAYLOAD).close()
+            # The backup was never sent a request, so its probe slot is still free
+            assert backup.requests == 0
+            assert pool.endpoints[1].breaker.state != "half-open"
+
+            primary.fail_rate = 1.0
+            response = pool.post(PAYLOAD)
+            assert response.status_code == 200
+            response.close()
+            assert backup.requests == 1
+            assert pool.endpoints[1].breaker.state == "closed"
+        finally:
+            pool.close()
+            transport.close()
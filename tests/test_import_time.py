@@ -0,0 +1,10 @@
+import os
+
+from benchmarks.bench_import_time import check
+
+
+def test_startup_imports_stay_within_budget():
+    # Same check as `python -m benchmarks.bench_import_time`; slow machines raise the budgets with the scale
+    scale = float(os.getenv("CHAT_CLI_IMPORT_TIME_SCALE", "1.0"))
+    lines, problems = check(runs=3, scale=scale)
+    assert not problems, "\n".join(lines)
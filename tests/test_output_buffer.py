@@ -0,0 +1,40 @@
+import io
+import os
+
+from rich.console import Console
+
+from command_executor import CommandExecutor
+from output_buffer import OutputBuffer, remove_spill_files
+
+
+def test_spills_only_after_overflow():
+    buffer = OutputBuffer(head_lines=2, tail_lines=2, spill_on_overflow=True)
+    buffer.write("1\n2\n3\n4\n")
+    buffer.flush()
+    assert buffer.spill_path is None
+
+    buffer = OutputBuffer(head_lines=2, tail_lines=2, spill_on_overflow=True)
+    buffer.write("1\n2\n3\n4\n5\n")
+    buffer.flush()
+    assert buffer.text() == "1\n2\n... [1 lines omitted] ...\n4\n5"
+    with open(buffer.spill_path) as f:
+        assert f.read() == "1\n2\n3\n4\n5\n"
+    remove_spill_files([buffer.spill_path])
+    assert not os.path.exists(buffer.spill_path)
+
+
+def test_next_command_removes_previous_spill_file(monkeypatch):
+    monkeypatch.setenv("CHAT_CLI_OUTPUT_HEAD_LINES", "5")
+    monkeypatch.setenv("CHAT_CLI_OUTPUT_TAIL_LINES", "5")
+    executor = CommandExecutor(Console(file=io.StringIO()), persistent_shell=False)
+    try:
+        _, first = executor.execute_command("seq 1 100")
+        assert first.stdout_file and os.path.exists(first.stdout_file)
+        _, second = executor.execute_command("echo ok")
+        assert not os.path.exists(first.stdout_file)
+        assert second.stdout_file is None
+
+        _, third = executor.execute_command("seq 1 100")
+    finally:
+        executor.close()
+    assert not os.path.exists(third.stdout_file)
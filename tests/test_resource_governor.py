@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import resource_governor
+from resource_governor import ResourceLimits, kill_process_group
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="POSIX process groups and rlimits")
+
+
+def test_timeout_is_off_by_default(monkeypatch):
+    monkeypatch.delenv("CHAT_CLI_CMD_TIMEOUT", raising=False)
+    limits = ResourceLimits.from_env()
+    assert limits.timeout == 0 and limits.deadline() is None
+
+
+def test_wrap_leaves_commands_alone_without_limits():
+    assert ResourceLimits().wrap(["ls", "-la"]) == ["ls", "-la"]
+
+
+def test_wrap_applies_limits_and_keeps_arguments():
+    limits = ResourceLimits(cpu_seconds=5, memory_bytes=512 * 1024 * 1024, nice=3)
+    args = limits.wrap([sys.executable, "-c", "import os, resource, sys; "
+                        "print(resource.getrlimit(resource.RLIMIT_CPU), resource.getrlimit(resource.RLIMIT_AS), "
+                        "os.nice(0), sys.argv[1:])", "a b", "$HOME"])
+    output = subprocess.run(args, capture_output=True, text=True, check=True).stdout
+    assert output.strip() == f"(5, 6) ({512 << 20}, {512 << 20}) {os.nice(0) + 3} ['a b', '$HOME']"
+
+
+def test_kill_process_group_survives_permission_error(monkeypatch):
+    process = subprocess.Popen(["sleep", "30"], start_new_session=True)
+
+    def killpg(pid, sig):
+        raise PermissionError(1, "Operation not permitted")
+
+    monkeypatch.setattr(resource_governor.os, "killpg", killpg)
+    kill_process_group(process, grace=0.1)
+    assert process.returncode is not None
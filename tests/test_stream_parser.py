@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from stream_parser import IncrementalCommandParser, iter_stream_text
+
+RESPONSE = {
+    "commands": ["df -h", "du -sh ~/다운로드 | sort -h", "echo \"끝 ✓\""],
+    "description": "디스크 사용량을 확인합니다",
+    "dangerous": False,
+}
+
+
+class FakeResponse:
+    def __init__(self, body: bytes, content_type: str, size: int):
+        self.headers = {"Content-Type": content_type}
+        self._chunks = [body[i:i + size] for i in range(0, len(body), size)]
+
+    def iter_content(self, chunk_size=None, decode_unicode=False):
+        assert not decode_unicode, "the body must be decoded by the parser, not by requests"
+        yield from self._chunks
+
+
+def _sse(text: str, delta_size: int, newline: str = "\n") -> bytes:
+    events = [json.dumps({"delta": text[i:i + delta_size]}, ensure_ascii=False)
+              for i in range(0, len(text), delta_size)]
+    return "".join(f"data: {event}{newline}{newline}" for event in events + ["[DONE]"]).encode("utf-8")
+
+
+def _parse(response) -> IncrementalCommandParser:
+    parser = IncrementalCommandParser()
+    for chunk in iter_stream_text(response):
+        assert isinstance(chunk, str)
+        parser.feed(chunk)
+    return parser
+
+
+# Byte chunk sizes of 1 and 2 split every multi-byte character and every "data:" line,
+# 7 and 13 cut SSE frames and JSON strings at uneven places
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 13, 4096])
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_event_stream_split_anywhere(size, newline):
+    text = json.dumps(RESPONSE, ensure_ascii=False)
+    parser = _parse(FakeResponse(_sse(text, 5, newline), "text/event-stream", size))
+    assert parser.done
+    assert parser.commands == RESPONSE["commands"]
+    assert parser.result() == RESPONSE
+
+
+def test_event_stream_without_charset_is_utf8():
+    text = json.dumps(RESPONSE, ensure_ascii=False)
+    chunks = list(iter_stream_text(FakeResponse(_sse(text, len(text)), "text/event-stream", 4096)))
+    assert "".join(chunks) == text
+
+
+@pytest.mark.parametrize("size", [1, 5, 4096])
+def test_plain_chunked_body(size):
+    body = json.dumps(RESPONSE, ensure_ascii=False).encode("utf-8")
+    parser = _parse(FakeResponse(body, "application/octet-stream", size))
+    assert parser.result() == RESPONSE
+
+
+def test_declared_charset_is_honoured():
+    body = "디스크".encode("euc-kr")
+    assert "".join(iter_stream_text(FakeResponse(body, "text/plain; charset=euc-kr", 1))) == "디스크"
+
+
+def test_multi_line_event_and_missing_final_blank_line():
+    body = b": comment\nevent: delta\ndata: first\ndata: second\n\ndata: {\"text\": \"last\"}"
+    assert list(iter_stream_text(FakeResponse(body, "text/event-stream", 3))) == ["first\nsecond", "last"]
+
+
+def test_parser_reports_commands_as_their_strings_close():
+    parser = IncrementalCommandParser()
+    assert parser.feed('{"commands": ["ls -la", "echo \\"a') == ["ls -la"]
+    assert parser.feed(']b\\""], "dangerous": tr') == ['echo "a]b"']
+    assert parser.fields == {"commands": ["ls -la", 'echo "a]b"']}
+    parser.feed("ue}")
+    assert parser.result()["dangerous"] is True
+
+
+def test_raw_deltas_that_are_valid_json_stay_text():
+    body = b'data: {"commands": [\n\ndata: "ls -la"\n\ndata: ]}\n\ndata: [DONE]\n\n'
+    parser = _parse(FakeResponse(body, "text/event-stream", 4))
+    assert parser.commands == ["ls -la"]
+    assert parser.result() == {"commands": ["ls -la"]}
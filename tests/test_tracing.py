@@ -0,0 +1,21 @@
+import os
+
+from tracing import Tracer
+
+
+def test_tracing_is_opt_in(monkeypatch, tmp_path):
+    monkeypatch.delenv("CHAT_CLI_TRACE", raising=False)
+    tracer = Tracer(path=str(tmp_path / "trace.jsonl"))
+    with tracer.span("phase"):
+        pass
+    tracer.close()
+    assert not tracer.enabled
+    assert not os.path.exists(tmp_path / "trace.jsonl")
+
+    monkeypatch.setenv("CHAT_CLI_TRACE", "1")
+    tracer = Tracer(path=str(tmp_path / "trace.jsonl"))
+    with tracer.span("phase"):
+        pass
+    tracer.close()
+    assert tracer.percentiles()["phase"]["count"] == 1
+    assert os.path.getsize(tmp_path / "trace.jsonl") > 0
@@ -0,0 +1,154 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from typing import Deque, Dict, List, Optional
+
+from cache_paths import cache_dir
+
+
+class _NullSpan:
+    """Shared stand-in when tracing is disabled; every method is a no-op"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+    def end(self):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = ("tracer", "name", "attrs", "trace_id", "span_id", "parent_id", "wall_start", "start", "_ended")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        stack = tracer._stack()
+        parent = stack[-1] if stack else None
+        self.trace_id = parent.trace_id if parent else os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.span_id = os.urandom(4).hex()
+        self._ended = False
+        stack.append(self)
+        self.wall_start = time.time()
+        self.start = time.perf_counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.end()
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def end(self):
+        if self._ended:
+            return
+        self._ended = True
+        duration = time.perf_counter() - self.start
+        stack = self.tracer._stack()
+        if self in stack:
+            stack.remove(self)
+        self.tracer._finish(self, duration)
+
+
+class Tracer:
+    """Lightweight spans written to a rotating JSONL file, with in-memory percentiles per phase
+
+    When disabled, span() hands back one shared no-op object, so the
+    instrumented paths cost a method call and nothing else.
+    """
+
+    def __init__(self, path: Optional[str] = None, enabled: Optional[bool] = None,
+                 max_bytes: Optional[int] = None, backups: int = 3, history: int = 2048):
+        if enabled is None:
+            enabled = os.getenv('CHAT_CLI_TRACE', '0').lower() in ('1', 'true', 'yes')
+        self.enabled = enabled
+        self.path = path or os.path.join(cache_dir(), "trace.jsonl")
+        self.counters: Counter = Counter()
+        self._durations: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=history))
+        self._local = threading.local()
+        self._handler = None
+        if enabled:
+            from logging.handlers import RotatingFileHandler
+
+            max_bytes = max_bytes or int(os.getenv('CHAT_CLI_TRACE_MAX_BYTES', str(5 * 1024 * 1024)))
+            # The handler rotates trace.jsonl -> trace.jsonl.1 ... and serializes writes between threads
+            try:
+                self._handler = RotatingFileHandler(self.path, maxBytes=max_bytes, backupCount=backups,
+                                                    encoding="utf-8")
+            except OSError:
+                pass  # Unwritable trace file: keep the in-memory percentiles only
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def span(self, name: str, **attrs):
+        """Context manager timing one phase; nested spans share the trace id of the outermost"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, attrs)
+
+    # A started span that is ended explicitly, for phases that do not fit a with block
+    start_span = span
+
+    def count(self, name: str, amount: int = 1):
+        self.counters[name] += amount
+
+    def _finish(self, span: Span, duration: float):
+        self._durations[span.name].append(duration)
+        if self._handler is None:
+            return
+        record = {
+            "trace": span.trace_id,
+            "span": span.span_id,
+            "parent": span.parent_id,
+            "name": span.name,
+            "start": round(span.wall_start, 6),
+            "duration": round(duration, 6),
+        }
+        if span.attrs:
+            record["attrs"] = span.attrs
+        self._write(json.dumps(record, ensure_ascii=False, default=str))
+
+    def _write(self, line: str):
+        import logging
+
+        self._handler.handle(logging.makeLogRecord({"msg": line, "levelno": logging.INFO, "levelname": "INFO"}))
+
+    def percentiles(self) -> Dict[str, Dict[str, float]]:
+        """count, p50, p95 and p99 (seconds) of each phase seen in this session"""
+        summary = {}
+        for name, durations in list(self._durations.items()):
+            values = sorted(durations)
+            if not values:
+                continue
+
+            def rank(p: float) -> float:
+                return values[max(0, math.ceil(p * len(values)) - 1)]  # Nearest rank
+
+            summary[name] = {"count": len(values), "p50": rank(0.50), "p95": rank(0.95), "p99": rank(0.99)}
+        return summary
+
+    def close(self):
+        if self._handler is not None:
+            self._handler.close()